@@ -0,0 +1,143 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import author_scope, bump
+from posts.feed import backfill_feed
+from posts.models import Comment, Follow
+from posts.tests.test import PostsTestCase
+from posts.utils import PAGINATE_BY, encode_cursor
+
+
+class ApiTests(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.POSTS = reverse('api:posts')
+        self.FOLLOW = reverse('api:follow')
+        self.GROUP_POSTS = reverse('api:group_posts', args=[self.group.slug])
+        self.PROFILE = reverse('api:profile', args=[self.author.username])
+        self.PROFILE_POSTS = reverse(
+            'api:profile_posts', args=[self.author.username]
+        )
+        self.POST_DETAIL = reverse('api:post_detail', args=[self.post.pk])
+        self.POST_COMMENTS = reverse(
+            'api:post_comments', args=[self.post.pk]
+        )
+
+    def test_post_lists(self):
+        """Списки постов листаются курсором до конца без повторов."""
+        Follow.objects.create(user=self.user, author=self.author)
+        backfill_feed(self.user, self.author)
+        lists = (
+            (self.client, self.POSTS, self.posts),
+            (self.client, self.GROUP_POSTS, self.group.posts.all()),
+            (self.client, self.PROFILE_POSTS, self.author.posts.all()),
+            (self.client_user, self.FOLLOW, self.author.posts.all()),
+        )
+        for client, url, posts in lists:
+            with self.subTest(url=url, client=client.name):
+                ids = []
+                while url:
+                    data = client.get(url).json()
+                    self.assertLessEqual(len(data['results']), PAGINATE_BY)
+                    ids.extend(post['id'] for post in data['results'])
+                    url = data['next']
+                self.assertEqual(
+                    ids,
+                    list(posts.order_by('-pub_date', '-pk').values_list(
+                        'pk', flat=True
+                    ))
+                )
+
+    def test_cursors_past_the_end(self):
+        """Курсор за концом списка - пустая страница без ссылок."""
+        oldest = self.posts.order_by('pub_date', 'pk').first()
+        newest = self.posts.order_by('-pub_date', '-pk').first()
+        cursors = (
+            ('after', encode_cursor(oldest.pub_date, oldest.pk)),
+            ('before', encode_cursor(newest.pub_date, newest.pk)),
+        )
+        for parameter, cursor in cursors:
+            with self.subTest(parameter=parameter):
+                response = self.client.get(self.POSTS, {parameter: cursor})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    response.json(),
+                    {'results': [], 'next': None, 'previous': None},
+                )
+
+    def test_lists_without_comments_count(self):
+        """Число комментариев есть только у поста: списки его не кешируют."""
+        post = self.client.get(self.POSTS).json()['results'][0]
+        self.assertNotIn('comments_count', post)
+        response = self.client.get(self.POSTS, {'fields': 'comments_count'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_fields(self):
+        """?fields= ограничивает набор полей, неизвестное поле - ошибка."""
+        response = self.client.get(self.POSTS, {'fields': 'id,author'})
+        post = response.json()['results'][0]
+        self.assertEqual(post, {'id': post['id'], 'author': 'Author'})
+        self.assertIn('fields=id%2Cauthor', response.json()['next'])
+
+        response = self.client.get(self.POSTS, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['error'])
+
+    def test_post_detail_and_profile(self):
+        """Пост с комментариями и профиль со счетчиками."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        data = self.client.get(self.POST_DETAIL).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(data['comments']['results'][0]['author'], 'User')
+        data = self.client.get(self.POST_COMMENTS).json()
+        self.assertEqual(len(data['results']), 1)
+
+        data = self.client_user.get(self.PROFILE).json()
+        self.assertEqual(data['posts_count'], self.COUNT_POSTS_TEST)
+        self.assertFalse(data['following'])
+
+    def test_profile_following_count(self):
+        """Подписка сразу видна в профиле читателя."""
+        profile = reverse('api:profile', args=[self.user.username])
+        self.assertEqual(self.client.get(profile).json()['following_count'], 0)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.client.get(profile).json()['following_count'], 1)
+
+    def test_profile_following_from_cached_set(self):
+        """Подписка в профиле берется из кешированного множества."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(self.client_user.get(self.PROFILE).json()['following'])
+        # Страница строится заново, множество подписок остается в кеше.
+        bump(author_scope(self.author.username))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client_user.get(self.PROFILE).json()
+        self.assertTrue(data['following'])
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'posts_follow' in query['sql']
+        ])
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON с кодом ответа."""
+        errors = (
+            (self.client.get(self.FOLLOW), HTTPStatus.UNAUTHORIZED),
+            (
+                self.client.get(reverse('api:post_detail', args=[0])),
+                HTTPStatus.NOT_FOUND
+            ),
+            (
+                self.client_author.post(self.POSTS),
+                HTTPStatus.METHOD_NOT_ALLOWED
+            ),
+        )
+        for response, status in errors:
+            with self.subTest(status=status):
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
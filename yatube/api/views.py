@@ -0,0 +1,236 @@
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from core.db import read_replica
+from posts.cache import (
+    INDEX, author_scope, group_scope, post_detail_scopes,
+    versioned_cache_page
+)
+from posts.counters import get_user_stats
+from posts.feed import FEED_ORDERING, get_feed
+from posts.follows import is_following
+from posts.models import Comment, Group, Post, User
+from posts.utils import (
+    COMMENTS_ORDERING, COMMENTS_PER_PAGE, CURSOR_ORDERING, PAGINATE_BY,
+    get_cursor_page
+)
+
+# Поле ответа -> поле для values(). Модели целиком не создаются.
+POST_FIELDS: dict = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'thumbnail': 'image_small',
+    'comments_count': 'comments_count',
+}
+# Списки кешируются до изменения ленты, а новый комментарий сдвигает
+# только поколение поста: число комментариев есть лишь у поста.
+POST_LIST_FIELDS: dict = {
+    name: lookup for name, lookup in POST_FIELDS.items()
+    if name != 'comments_count'
+}
+COMMENT_FIELDS: dict = {
+    'id': 'pk',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+JSON_PARAMS: dict = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+CONVERTERS: dict = {
+    'image': _media_url,
+    'thumbnail': _media_url,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message, status):
+    return JsonResponse(
+        {'error': message}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view):
+    """Только чтение; view возвращает словарь, ошибки отдаются в JSON."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return _error('Метод не поддерживается', 405)
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as exc:
+            return _error(str(exc), exc.status)
+        except Http404:
+            return _error('Не найдено', 404)
+        return JsonResponse(data, json_dumps_params=JSON_PARAMS)
+    return wrapper
+
+
+def selected_fields(request, fields):
+    """Поля из ?fields=a,b; без параметра - все поля."""
+    names = [
+        name.strip() for name in request.GET.get('fields', '').split(',')
+        if name.strip()
+    ]
+    if not names:
+        return fields
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return {name: fields[name] for name in names}
+
+
+def serialize(row, fields):
+    data = {}
+    for name, lookup in fields.items():
+        value = row[lookup]
+        convert = CONVERTERS.get(name)
+        data[name] = convert(value) if convert else value
+    return data
+
+
+def _link(request, parameter, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query[parameter] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def paginate(request, queryset, fields, ordering=CURSOR_ORDERING,
+             per_page=PAGINATE_BY):
+    """Курсорная страница из values(): только нужные поля и ключ."""
+    page = get_cursor_page(
+        queryset.values(*{*fields.values(), *ordering}),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        ordering=ordering,
+        per_page=per_page,
+    )
+    return {
+        'results': [serialize(row, fields) for row in page],
+        'next': _link(request, 'after', page.next_cursor),
+        'previous': _link(request, 'before', page.previous_cursor),
+    }
+
+
+@versioned_cache_page(lambda request: (INDEX,))
+@read_replica
+@api_view
+def index_posts(request):
+    return paginate(
+        request,
+        Post.objects.all(),
+        selected_fields(request, POST_LIST_FIELDS),
+    )
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', 401)
+    return paginate(
+        request,
+        get_feed(request.user),
+        selected_fields(request, POST_LIST_FIELDS),
+        FEED_ORDERING,
+    )
+
+
+@versioned_cache_page(
+    lambda request, group_slug: (group_scope(group_slug),)
+)
+@read_replica
+@api_view
+def group_posts(request, group_slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=group_slug)
+    return paginate(
+        request,
+        Post.objects.filter(group=group),
+        selected_fields(request, POST_LIST_FIELDS),
+    )
+
+
+@versioned_cache_page(
+    lambda request, username: (author_scope(username),)
+)
+@read_replica
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return paginate(
+        request,
+        Post.objects.filter(author=author),
+        selected_fields(request, POST_LIST_FIELDS),
+    )
+
+
+@versioned_cache_page(
+    lambda request, username: (author_scope(username),)
+)
+@read_replica
+@api_view
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    stats = get_user_stats(author)
+    data = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }
+    if request.user.is_authenticated:
+        data['following'] = is_following(request.user, author)
+    return data
+
+
+@versioned_cache_page(post_detail_scopes)
+@api_view
+def post_detail(request, post_id):
+    fields = selected_fields(request, POST_FIELDS)
+    row = Post.objects.filter(pk=post_id).values(*fields.values()).first()
+    if row is None:
+        raise Http404
+    data = serialize(row, fields)
+    data['comments'] = paginate(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        COMMENTS_ORDERING,
+        COMMENTS_PER_PAGE,
+    )
+    return data
+
+
+@versioned_cache_page(post_detail_scopes)
+@api_view
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return paginate(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        selected_fields(request, COMMENT_FIELDS),
+        COMMENTS_ORDERING,
+        COMMENTS_PER_PAGE,
+    )
@@ -0,0 +1,147 @@
+"""
+Двухуровневый кеш: небольшой LRU в памяти процесса перед общим кешем.
+    Локально хранятся только ключи с префиксами LOCAL_PREFIXES. Значение
+    такого ключа не должно меняться: актуальность задает версия в самом
+    ключе (поколение ленты, дата изменения поста). Новая версия - новый
+    ключ, поэтому локальные копии в других воркерах не устаревают.
+    Остальные ключи (поколения, блокировки) всегда идут в общий кеш.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+from .lru import LRUCache
+
+# Отличает отсутствие ключа от сохраненного None.
+_MISSING = object()
+LOCAL_MAX_ENTRIES: int = 256
+# Верхняя граница жизни локальной копии: ключ, удаленный в другом
+# воркере, исчезнет отсюда не позже этого срока.
+LOCAL_TIMEOUT: int = 60
+
+
+class TwoTierCache(BaseCache):
+    """
+    LOCATION - псевдоним общего кеша в CACHES.
+    OPTIONS: LOCAL_PREFIXES, LOCAL_MAX_ENTRIES, LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self.local_prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        self._local = LRUCache(
+            options.get('LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES),
+            self.local_timeout,
+        )
+
+    @cached_property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _is_local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def _local_key(self, key, version):
+        return self.shared.make_key(key, version)
+
+    def _local_get(self, key, version):
+        return self._local.get(self._local_key(key, version), _MISSING)
+
+    def _local_set(self, key, value, timeout, version):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        self._local.set(self._local_key(key, version), value, timeout)
+
+    def _local_delete(self, key, version):
+        self._local.delete(self._local_key(key, version))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added and self._is_local(key):
+            self._local_set(key, value, timeout, version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        if not self._is_local(key):
+            return self.shared.get(key, default, version)
+        value = self._local_get(key, version)
+        if value is not _MISSING:
+            return value
+        # Промах не запоминается: значение может появиться в общем кеше.
+        value = self.shared.get(key, version=version)
+        if value is None:
+            return default
+        self._local_set(key, value, self.local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remote = {}, []
+        for key in keys:
+            value = (
+                self._local_get(key, version) if self._is_local(key)
+                else _MISSING
+            )
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(remote, version)
+            for key, value in fetched.items():
+                if self._is_local(key):
+                    self._local_set(key, value, self.local_timeout, version)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        if self._is_local(key):
+            self._local_set(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            if self._is_local(key) and key not in failed:
+                self._local_set(key, value, timeout, version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._local_delete(key, version)
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(key, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        if (
+            self._is_local(key)
+            and self._local_get(key, version) is not _MISSING
+        ):
+            return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+    def clear_local(self):
+        self._local.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def stats(self):
+        """Попадания, промахи и вытеснения локального уровня."""
+        return self._local.stats()
@@ -0,0 +1,84 @@
+import contextlib
+import contextvars
+import functools
+
+from django.conf import settings
+
+REPLICA = 'replica'
+SAFE_METHODS: tuple = ('GET', 'HEAD')
+
+# Настройки соединения SQLite: WAL не блокирует читателей при записи,
+# synchronous=NORMAL в режиме WAL не теряет целостность при сбое.
+SQLITE_PRAGMAS: tuple = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+)
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+_use_primary = contextvars.ContextVar('use_primary', default=False)
+
+
+def has_replica():
+    return REPLICA in settings.DATABASES
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: настраивает новое соединение SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.execute(f'PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}')
+        cursor.execute(f'PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}')
+
+
+def read_replica(view):
+    """
+    Чтение в представлении идет с реплики, если она настроена.
+        Только для GET/HEAD и анонимов: авторизованный пользователь
+        должен сразу видеть свои изменения, а реплика может отставать.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Чтение внутри блока идет с основной базы и в read_replica."""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReplicaRouter:
+    """Направляет чтение из read_replica-представлений на реплику."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _use_primary.get() and has_replica():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,87 @@
+"""
+LRU в памяти процесса с ограничением числа записей и времени жизни.
+    Общий для потоков воркера: все операции под одной блокировкой.
+    Кеши с именем попадают в /metrics/ (registered_stats).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_registry = {}
+
+
+class LRUCache:
+    """
+    max_entries - сколько записей хранится, самые давние вытесняются.
+    timeout - время жизни записи в секундах.
+    name - имя для мониторинга.
+    """
+
+    def __init__(self, max_entries, timeout, name=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        if name is not None:
+            _registry[name] = self
+
+    def get(self, key, default=None, version=None):
+        """
+        Значение по ключу или default.
+            Запись другой версии считается устаревшей и удаляется.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires, item_version = item
+            if expires <= time.monotonic() or item_version != version:
+                del self._entries[key]
+                if item_version != version:
+                    self.invalidations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, timeout=None, version=None):
+        """Запоминает значение; timeout не больше собственного таймаута."""
+        lifetime = self.timeout if timeout is None else min(
+            timeout, self.timeout
+        )
+        if lifetime <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + lifetime, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Число записей, попадания, промахи, вытеснения и сбросы."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def registered_stats():
+    """{имя: stats()} кешей, созданных с именем."""
+    return {name: lru.stats() for name, lru in sorted(_registry.items())}
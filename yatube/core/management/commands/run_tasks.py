@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import tasks
+
+# Как часто обработчик возвращает зависшие задачи и чистит выполненные.
+MAINTENANCE_INTERVAL: float = 60.0
+
+
+class Command(BaseCommand):
+    help = 'Обработчик очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.TASKS_POLL,
+            help='Пауза между опросами пустой очереди, секунды.',
+        )
+
+    def maintain(self):
+        stalled = tasks.requeue_stalled()
+        if stalled:
+            self.stdout.write(
+                self.style.WARNING(f'Возвращено в очередь: {stalled}')
+            )
+        tasks.purge_done()
+
+    def handle(self, *args, **options):
+        worker = tasks.worker_name()
+        next_maintenance = 0.0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_maintenance:
+                    self.maintain()
+                    next_maintenance = (
+                        time.monotonic() + MAINTENANCE_INTERVAL
+                    )
+                task = tasks.claim(worker)
+                if task is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll'])
+                    continue
+                if tasks.execute(task):
+                    took = task.finished - task.started
+                    self.stdout.write(
+                        f'{task.name}{task.arguments}: '
+                        f'{took.total_seconds():.3f} с'
+                    )
+                else:
+                    self.stdout.write(self.style.ERROR(
+                        f'{task.name}{task.arguments}: попытка '
+                        f'{task.attempts} - {task.error.splitlines()[-1]}'
+                    ))
+        except KeyboardInterrupt:
+            self.stdout.write('Обработчик остановлен')
@@ -0,0 +1,248 @@
+"""
+Метрики производительности запросов.
+    Данные текущего запроса лежат в contextvar, агрегаты по представлениям -
+    в памяти процесса. У каждого воркера свои агрегаты.
+"""
+import bisect
+import contextvars
+import math
+import threading
+
+# Границы корзин гистограммы времени ответа, секунды.
+BUCKETS: tuple = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+UNRESOLVED = '<unresolved>'
+PREFIX = 'yatube'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_views = {}
+
+
+class RequestMetrics:
+    """Счетчики одного запроса."""
+    __slots__ = (
+        'db_time', 'queries', 'template_time', 'cache_hits', 'cache_misses',
+        'fragment_hits', 'fragment_misses',
+    )
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+
+class ViewMetrics:
+    """Агрегаты одного представления: гистограмма и суммы счетчиков."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+    def add(self, duration, metrics):
+        self.buckets[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.duration += duration
+        self.db_time += metrics.db_time
+        self.queries += metrics.queries
+        self.template_time += metrics.template_time
+        self.cache_hits += metrics.cache_hits
+        self.cache_misses += metrics.cache_misses
+        self.fragment_hits += metrics.fragment_hits
+        self.fragment_misses += metrics.fragment_misses
+
+
+def start():
+    """Начинает сбор метрик запроса. Возвращает токен для finish."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def current():
+    return _current.get()
+
+
+def finish(token, view_name, duration, metrics):
+    """Заканчивает сбор и добавляет запрос в агрегаты представления."""
+    _current.reset(token)
+    with _lock:
+        view = _views.get(view_name)
+        if view is None:
+            view = _views[view_name] = ViewMetrics()
+        view.add(duration, metrics)
+
+
+def record_query(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.db_time += duration
+        metrics.queries += 1
+
+
+def record_template(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_time += duration
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def record_fragments(hits, misses):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.fragment_hits += hits
+        metrics.fragment_misses += misses
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+def snapshot():
+    """Копия агрегатов {представление: ViewMetrics}."""
+    with _lock:
+        return {
+            name: _copy(view) for name, view in sorted(_views.items())
+        }
+
+
+def _copy(view):
+    copy = ViewMetrics()
+    copy.__dict__.update(view.__dict__)
+    copy.buckets = list(view.buckets)
+    return copy
+
+
+def server_timing(duration, metrics):
+    """Значение заголовка Server-Timing, длительности в миллисекундах."""
+    parts = [
+        f'app;dur={duration * 1000:.1f}',
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} q"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+    ]
+    if metrics.cache_hits or metrics.cache_misses:
+        state = 'hit' if metrics.cache_hits else 'miss'
+        parts.append(f'cache;desc="{state}"')
+    fragments = metrics.fragment_hits + metrics.fragment_misses
+    if fragments:
+        parts.append(f'frag;desc="{metrics.fragment_hits}/{fragments} hit"')
+    return ', '.join(parts)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _format_le(bound):
+    return '+Inf' if math.isinf(bound) else repr(bound)
+
+
+def prometheus():
+    """Агрегаты в текстовом формате Prometheus."""
+    views = snapshot()
+    lines = [
+        f'# HELP {PREFIX}_request_duration_seconds Время ответа.',
+        f'# TYPE {PREFIX}_request_duration_seconds histogram',
+    ]
+    for name, view in views.items():
+        label = f'view="{_escape(name)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (math.inf,), view.buckets):
+            cumulative += count
+            lines.append(
+                f'{PREFIX}_request_duration_seconds_bucket'
+                f'{{{label},le="{_format_le(bound)}"}} {cumulative}'
+            )
+        lines.append(
+            f'{PREFIX}_request_duration_seconds_sum{{{label}}} '
+            f'{view.duration}'
+        )
+        lines.append(
+            f'{PREFIX}_request_duration_seconds_count{{{label}}} '
+            f'{view.count}'
+        )
+    counters = (
+        ('db_duration_seconds_total', 'db_time', 'Время запросов к БД.'),
+        ('db_queries_total', 'queries', 'Число запросов к БД.'),
+        ('template_duration_seconds_total', 'template_time',
+         'Время рендеринга шаблонов.'),
+        ('cache_hits_total', 'cache_hits', 'Страницы из кеша.'),
+        ('cache_misses_total', 'cache_misses', 'Страницы мимо кеша.'),
+        ('fragment_hits_total', 'fragment_hits', 'Фрагменты из кеша.'),
+        ('fragment_misses_total', 'fragment_misses',
+         'Фрагменты мимо кеша.'),
+    )
+    for metric, field, description in counters:
+        lines.append(f'# HELP {PREFIX}_{metric} {description}')
+        lines.append(f'# TYPE {PREFIX}_{metric} counter')
+        for name, view in views.items():
+            lines.append(
+                f'{PREFIX}_{metric}{{view="{_escape(name)}"}} '
+                f'{getattr(view, field)}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def queue_prometheus(stats):
+    """Состояние очереди задач (core.tasks.queue_stats) для Prometheus."""
+    gauges = (
+        ('tasks_pending', 'pending', 'Задачи в очереди.'),
+        ('tasks_running', 'running', 'Выполняемые задачи.'),
+        ('tasks_failed', 'failed', 'Задачи, исчерпавшие попытки.'),
+        ('tasks_oldest_pending_seconds', 'oldest_pending_seconds',
+         'Возраст самой старой готовой к запуску задачи.'),
+        ('tasks_wait_seconds', 'wait_seconds',
+         'Среднее ожидание в очереди последних задач.'),
+        ('tasks_run_seconds', 'run_seconds',
+         'Среднее время выполнения последних задач.'),
+    )
+    lines = []
+    for metric, field, description in gauges:
+        lines.append(f'# HELP {PREFIX}_{metric} {description}')
+        lines.append(f'# TYPE {PREFIX}_{metric} gauge')
+        lines.append(f'{PREFIX}_{metric} {stats[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def lru_prometheus(stats):
+    """Кеши в памяти процесса (core.lru.registered_stats) для Prometheus."""
+    series = (
+        ('lru_entries', 'entries', 'gauge', 'Записей в кеше.'),
+        ('lru_hits_total', 'hits', 'counter', 'Попадания.'),
+        ('lru_misses_total', 'misses', 'counter', 'Промахи.'),
+        ('lru_evictions_total', 'evictions', 'counter',
+         'Вытеснены по размеру.'),
+        ('lru_invalidations_total', 'invalidations', 'counter',
+         'Сброшены при изменении.'),
+    )
+    lines = []
+    for metric, field, kind, description in series:
+        lines.append(f'# HELP {PREFIX}_{metric} {description}')
+        lines.append(f'# TYPE {PREFIX}_{metric} {kind}')
+        for name, values in stats.items():
+            lines.append(
+                f'{PREFIX}_{metric}{{cache="{_escape(name)}"}} '
+                f'{values[field]}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,50 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics
+
+
+def timed_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - start)
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет время ответа, время и число запросов к БД, рендеринг шаблонов
+    и попадания в кеш страниц.
+        Итог запроса - в заголовке Server-Timing, агрегаты по именам
+        представлений - на странице /metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timed_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            match = getattr(request, 'resolver_match', None)
+            metrics.finish(
+                token,
+                match.view_name if match else metrics.UNRESOLVED,
+                duration,
+                request_metrics,
+            )
+        response['Server-Timing'] = metrics.server_timing(
+            duration, request_metrics
+        )
+        return response
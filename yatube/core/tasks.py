@@ -0,0 +1,156 @@
+"""
+Очередь фоновых задач в базе данных.
+    Задача - функция, зарегистрированная декоратором task. Аргументы
+    сохраняются в JSON, поэтому передаются идентификаторы, а не объекты.
+    enqueue добавляет задачу после коммита транзакции, иначе обработчик
+    может не увидеть записанные данные. В режиме TASKS_EAGER задача
+    так же ждет коммита, но выполняется в том же процессе, без
+    обработчика (тесты).
+"""
+import datetime
+import json
+import os
+import socket
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Task
+
+# Сколько последних выполненных задач учитывается в задержке очереди.
+LATENCY_SAMPLE: int = 100
+
+_registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как задачу под именем module.function."""
+    name = f'{func.__module__}.{func.__name__}'
+    _registry[name] = func
+    func.task_name = name
+    return func
+
+
+def enqueue(func, *args):
+    """Ставит задачу в очередь после коммита текущей транзакции."""
+    name = func.task_name
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args))
+        return
+    arguments = json.dumps(args)
+    transaction.on_commit(
+        lambda: Task.objects.create(name=name, arguments=arguments)
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stalled():
+    """Возвращает в очередь задачи обработчиков, упавших во время работы."""
+    deadline = timezone.now() - datetime.timedelta(
+        seconds=settings.TASKS_TIMEOUT
+    )
+    return Task.objects.filter(
+        status=Task.RUNNING, started__lt=deadline
+    ).update(status=Task.PENDING)
+
+
+def claim(worker):
+    """
+    Забирает готовую к запуску задачу или возвращает None.
+        Захват - условный UPDATE по статусу: из двух обработчиков
+        задачу получает только один, блокировки строк не нужны.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            started=now,
+            worker=worker,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def _retry_delay(attempts):
+    # Экспоненциальная пауза: 10, 20, 40... секунд при TASKS_RETRY_DELAY=10.
+    return datetime.timedelta(
+        seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def execute(task_row):
+    """Выполняет захваченную задачу. Возвращает True при успехе."""
+    try:
+        func = _registry.get(task_row.name)
+        if func is None:
+            raise LookupError(f'Неизвестная задача {task_row.name}')
+        func(*json.loads(task_row.arguments))
+    except Exception:
+        now = timezone.now()
+        task_row.error = traceback.format_exc()
+        if task_row.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            task_row.status = Task.FAILED
+            task_row.finished = now
+        else:
+            task_row.status = Task.PENDING
+            task_row.run_at = now + _retry_delay(task_row.attempts)
+        task_row.save(update_fields=['status', 'finished', 'run_at', 'error'])
+        return False
+    task_row.status = Task.DONE
+    task_row.finished = timezone.now()
+    task_row.save(update_fields=['status', 'finished'])
+    return True
+
+
+def purge_done():
+    """Удаляет выполненные задачи старше TASKS_RETENTION секунд."""
+    deadline = timezone.now() - datetime.timedelta(
+        seconds=settings.TASKS_RETENTION
+    )
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished__lt=deadline
+    ).delete()
+    return deleted
+
+
+def queue_stats():
+    """
+    Состояние очереди: число задач по статусам, возраст самой старой
+    готовой к запуску задачи и средние задержки последних задач, секунды.
+    """
+    now = timezone.now()
+    counts = dict.fromkeys((Task.PENDING, Task.RUNNING, Task.FAILED), 0)
+    counts.update(
+        Task.objects.exclude(status=Task.DONE).order_by().values(
+            'status'
+        ).annotate(count=Count('pk')).values_list('status', 'count')
+    )
+    oldest = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by('run_at').values_list('run_at', flat=True).first()
+    recent = Task.objects.filter(status=Task.DONE).order_by(
+        '-finished'
+    ).values_list('created', 'started', 'finished')[:LATENCY_SAMPLE]
+    waits, runs = [], []
+    for created, started, finished in recent:
+        waits.append((started - created).total_seconds())
+        runs.append((finished - started).total_seconds())
+    return {
+        **counts,
+        'oldest_pending_seconds': (
+            (now - oldest).total_seconds() if oldest else 0.0
+        ),
+        'wait_seconds': sum(waits) / len(waits) if waits else 0.0,
+        'run_seconds': sum(runs) / len(runs) if runs else 0.0,
+    }
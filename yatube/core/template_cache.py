@@ -0,0 +1,40 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+
+
+def django_engines():
+    """Движки шаблонов Django из настроек TEMPLATES."""
+    return [
+        backend.engine for backend in engines.all()
+        if hasattr(backend, 'engine')
+    ]
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах DIRS движка."""
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.endswith(('.html', '.txt')):
+                    path = os.path.relpath(os.path.join(root, file), directory)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_up(engine_list=None):
+    """
+    Компилирует все шаблоны проекта.
+        С cached.Loader скомпилированные шаблоны остаются в памяти,
+        и первый запрос к воркеру не читает и не разбирает файлы.
+    Возвращает {шаблон: ошибка} для шаблонов, которые не компилируются.
+    """
+    errors = {}
+    for engine in engine_list or django_engines():
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                errors[name] = str(exc)
+    return errors
@@ -0,0 +1,88 @@
+from django import template
+
+register = template.Library()
+
+# Сколько номеров страниц показывать по обе стороны от текущей.
+PAGE_WINDOW: int = 2
+PAGE_PARAMETERS: tuple = ('page', 'after', 'before')
+
+
+def _url(request, parameter, value):
+    """Текущий querystring, в котором заменен параметр пагинации."""
+    query = request.GET.copy()
+    for name in PAGE_PARAMETERS:
+        query.pop(name, None)
+    query[parameter] = value
+    return f'?{query.urlencode()}'
+
+
+def _link(label, url=None, active=False):
+    return {'label': label, 'url': url, 'active': active}
+
+
+def _cursor_links(request, page_obj):
+    links = []
+    if page_obj.has_previous():
+        links.append(_link(
+            '« Новее', _url(request, 'before', page_obj.previous_cursor)
+        ))
+    if page_obj.has_next():
+        links.append(_link(
+            'Старее »', _url(request, 'after', page_obj.next_cursor)
+        ))
+    return links
+
+
+def _no_count_links(request, page_obj):
+    links = []
+    if page_obj.has_previous():
+        links.append(_link(
+            '« Назад', _url(request, 'page', page_obj.previous_page_number())
+        ))
+    links.append(_link(page_obj.number, active=True))
+    if page_obj.has_next():
+        links.append(_link(
+            'Вперед »', _url(request, 'page', page_obj.next_page_number())
+        ))
+    return links
+
+
+def _number_links(request, page_obj, window):
+    number, last = page_obj.number, page_obj.paginator.num_pages
+    first_shown = max(number - window, 1)
+    last_shown = min(number + window, last)
+    links = []
+    if first_shown > 1:
+        links.append(_link(1, _url(request, 'page', 1)))
+        if first_shown > 2:
+            links.append(_link('…'))
+    for i in range(first_shown, last_shown + 1):
+        if i == number:
+            links.append(_link(i, active=True))
+        else:
+            links.append(_link(i, _url(request, 'page', i)))
+    if last_shown < last:
+        if last_shown < last - 1:
+            links.append(_link('…'))
+        links.append(_link(last, _url(request, 'page', last)))
+    return links
+
+
+@register.inclusion_tag('includes/_paginator.html', takes_context=True)
+def paginator(context, page_obj, window=PAGE_WINDOW):
+    """
+    Ссылки пагинатора.
+        Число ссылок не зависит от числа страниц: окно из 2 * window + 1
+        номеров вокруг текущей, первая и последняя страницы.
+        Курсорная страница и страница без COUNT(*) - только назад/вперед.
+    """
+    request = context['request']
+    if not page_obj or not page_obj.has_other_pages():
+        links = []
+    elif getattr(page_obj, 'is_cursor', False):
+        links = _cursor_links(request, page_obj)
+    elif not getattr(page_obj, 'has_count', True):
+        links = _no_count_links(request, page_obj)
+    else:
+        links = _number_links(request, page_obj, window)
+    return {'links': links}
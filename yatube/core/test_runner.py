@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Тесты выполняют фоновые задачи в своем процессе (TASKS_EAGER):
+    обработчик очереди в тестах не запущен.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.TASKS_EAGER = True
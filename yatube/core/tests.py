@@ -0,0 +1,369 @@
+import datetime
+import unittest
+
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.conf import settings
+from django.template import Engine
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+from django.utils import timezone
+
+from . import lru as lru_module, metrics, tasks
+from .cache_backends import TwoTierCache
+from .lru import LRUCache
+from .db import REPLICA, ReplicaRouter, read_replica, use_primary
+from .models import Task
+from .template_cache import django_engines, template_names, warm_up
+
+
+class CoreDatabaseTests(TestCase):
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite pragmas')
+    def test_sqlite_connection_is_tuned(self):
+        """Новое соединение SQLite получает настройки из core.db."""
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertGreater(cursor.fetchone()[0], 0)
+
+    def test_read_replica_router(self):
+        """Чтение идет с реплики только внутри read_replica-представления."""
+        router = ReplicaRouter()
+
+        @read_replica
+        def view(request):
+            return router.db_for_read(User)
+
+        databases = {'default': {}, REPLICA: {}}
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with override_settings(DATABASES=databases):
+            self.assertEqual(view(request), REPLICA)
+            self.assertIsNone(router.db_for_read(User))
+
+            request.user = User(username='reader')
+            self.assertIsNone(view(request))
+
+            request = RequestFactory().post('/')
+            request.user = AnonymousUser()
+            self.assertIsNone(view(request))
+
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            with use_primary():
+                self.assertIsNone(view(request))
+
+
+class CoreMetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.staff_client = Client()
+        self.staff_client.force_login(
+            User.objects.create(username='staff', is_staff=True)
+        )
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с временем БД и шаблонов."""
+        response = self.client.get('/')
+        timing = response['Server-Timing']
+        for part in ('app;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc="miss"'):
+            self.assertIn(part, timing)
+        response = self.client.get('/')
+        self.assertIn('cache;desc="hit"', response['Server-Timing'])
+
+    def test_metrics_endpoint(self):
+        """Агрегаты по представлениям доступны только персоналу."""
+        self.client.get('/')
+        self.client.get('/')
+
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        response = self.staff_client.get('/metrics/')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            text
+        )
+        self.assertIn('yatube_cache_hits_total{view="posts:index"} 1', text)
+        self.assertIn('yatube_cache_misses_total{view="posts:index"} 1', text)
+        view = metrics.snapshot()['posts:index']
+        self.assertGreater(view.template_time, 0)
+
+    def test_lru_metrics(self):
+        """Кеши в памяти процесса с именем видны в /metrics/."""
+        lru = LRUCache(2, 60, 'test')
+        self.addCleanup(lru_module._registry.pop, 'test')
+        lru.set('key', 'value')
+        lru.get('key')
+        text = self.staff_client.get('/metrics/').content.decode()
+        self.assertIn('yatube_lru_entries{cache="test"} 1', text)
+        self.assertIn('yatube_lru_hits_total{cache="test"} 1', text)
+
+
+class CoreLRUCacheTests(unittest.TestCase):
+
+    def test_eviction_order(self):
+        """Вытесняется запись, к которой дольше всего не обращались."""
+        lru = LRUCache(2, 60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')),
+                         (1, None, 3))
+        self.assertEqual(
+            lru.stats(),
+            {'entries': 2, 'hits': 3, 'misses': 1, 'evictions': 1,
+             'invalidations': 0},
+        )
+
+    def test_timeout_and_version(self):
+        """Запись устаревает по времени и при смене версии."""
+        lru = LRUCache(10, 60)
+        lru.set('expired', 1, timeout=0)
+        self.assertIsNone(lru.get('expired'))
+        lru.set('versioned', 1, version=(1, 2))
+        self.assertEqual(lru.get('versioned', version=(1, 2)), 1)
+        self.assertIsNone(lru.get('versioned', version=(1, 3)))
+        lru.set('deleted', 1)
+        lru.delete('deleted')
+        self.assertIsNone(lru.get('deleted'))
+        stats = lru.stats()
+        self.assertEqual((stats['entries'], stats['invalidations']), (0, 2))
+
+
+class CoreTemplateCacheTests(TestCase):
+
+    def test_warm_up_fills_cached_loader(self):
+        """После warm_up все шаблоны проекта уже скомпилированы."""
+        project_engine = django_engines()[0]
+        engine = Engine(
+            dirs=project_engine.dirs,
+            loaders=[(
+                'django.template.loaders.cached.Loader',
+                settings.TEMPLATE_LOADERS,
+            )],
+            libraries=project_engine.libraries,
+        )
+        names = template_names(engine)
+        self.assertIn('base.html', names)
+
+        self.assertEqual(warm_up([engine]), {})
+        loader = engine.template_loaders[0]
+        self.assertTrue(set(names) <= set(loader.get_template_cache))
+
+
+TWO_TIER_CACHES = {
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+    'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'LOCAL_PREFIXES': ['posts:page', 'posts:card']},
+    },
+}
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class CoreTwoTierCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def worker(self, max_entries=256):
+        """Кеш другого воркера: свой локальный уровень, общий кеш тот же."""
+        return TwoTierCache('shared', {
+            'OPTIONS': {
+                'LOCAL_PREFIXES': ['posts:page', 'posts:card'],
+                'LOCAL_MAX_ENTRIES': max_entries,
+            },
+        })
+
+    def test_local_keys_skip_shared_cache(self):
+        """Версионированный ключ читается из памяти процесса."""
+        worker = self.worker()
+        cache.set('posts:page:key', 'page')
+        self.assertEqual(worker.get('posts:page:key'), 'page')
+        worker.shared.delete('posts:page:key')
+        self.assertEqual(worker.get('posts:page:key'), 'page')
+        self.assertEqual(worker.stats()['hits'], 1)
+
+    def test_other_keys_always_read_shared_cache(self):
+        """Поколения лент видны всем воркерам сразу после изменения."""
+        worker = self.worker()
+        cache.set('posts:gen:index', 1, None)
+        self.assertEqual(worker.get('posts:gen:index'), 1)
+        cache.incr('posts:gen:index')
+        self.assertEqual(worker.get('posts:gen:index'), 2)
+        self.assertEqual(worker.get_many(['posts:gen:index']), {
+            'posts:gen:index': 2,
+        })
+
+    def test_least_recently_used_key_evicted(self):
+        worker = self.worker(max_entries=2)
+        for key in ('posts:card:1', 'posts:card:2'):
+            worker.set(key, key)
+        worker.get('posts:card:1')
+        worker.set('posts:card:3', 'posts:card:3')
+        worker.shared.clear()
+        self.assertEqual(worker.get('posts:card:1'), 'posts:card:1')
+        self.assertIsNone(worker.get('posts:card:2'))
+        self.assertEqual(worker.stats()['evictions'], 1)
+
+    def test_pages_coherent_across_workers(self):
+        """Новый пост виден на главной, закешированной другим воркером."""
+        user = User.objects.create_user(username='author')
+        client = Client()
+        client.get('/')
+        response = client.get('/')
+        self.assertIn('cache;desc="hit"', response['Server-Timing'])
+
+        # Копия старого поколения осталась в памяти процесса, но
+        # поколение ленты читается из общего кеша.
+        user.posts.create(text='Новый пост')
+        self.assertGreater(cache.stats()['entries'], 0)
+        self.assertContains(client.get('/'), 'Новый пост')
+
+
+CALLS = []
+
+
+@tasks.task
+def record_call(value):
+    CALLS.append(value)
+
+
+@tasks.task
+def fail_once(value):
+    if value not in CALLS:
+        CALLS.append(value)
+        raise RuntimeError('Временная ошибка')
+
+
+@tasks.task
+def always_fail():
+    raise RuntimeError('Постоянная ошибка')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class CoreTasksTests(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def run_worker(self):
+        call_command('run_tasks', '--once', stdout=StringIO())
+
+    def test_worker_retries_failed_task(self):
+        task = Task.objects.create(
+            name=fail_once.task_name, arguments='["a"]'
+        )
+        self.run_worker()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('Временная ошибка', task.error)
+
+    @override_settings(TASKS_MAX_ATTEMPTS=3)
+    def test_task_fails_after_max_attempts(self):
+        task = Task.objects.create(name=always_fail.task_name)
+        unknown = Task.objects.create(name='core.tests.missing')
+        self.run_worker()
+        for row in (task, unknown):
+            row.refresh_from_db()
+            self.assertEqual(row.status, Task.FAILED)
+            self.assertEqual(row.attempts, 3)
+        self.assertEqual(tasks.queue_stats()[Task.FAILED], 2)
+
+    def test_stalled_task_requeued(self):
+        """Задачу упавшего обработчика выполняет другой."""
+        started = timezone.now() - datetime.timedelta(
+            seconds=settings.TASKS_TIMEOUT + 1
+        )
+        task = Task.objects.create(
+            name=record_call.task_name, arguments='[1]',
+            status=Task.RUNNING, started=started, attempts=1,
+        )
+        self.run_worker()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(CALLS, [1])
+
+    def test_delayed_task_not_claimed(self):
+        Task.objects.create(
+            name=record_call.task_name, arguments='[1]',
+            run_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+        self.assertIsNone(tasks.claim('worker'))
+
+    def test_queue_metrics(self):
+        Task.objects.create(
+            name=record_call.task_name, arguments='[1]',
+            created=timezone.now() - datetime.timedelta(seconds=30),
+        )
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        text = client.get('/metrics/').content.decode()
+        self.assertIn('yatube_tasks_pending 1', text)
+
+        self.run_worker()
+        stats = tasks.queue_stats()
+        self.assertEqual(stats[Task.PENDING], 0)
+        self.assertGreaterEqual(stats['wait_seconds'], 30)
+
+
+@override_settings(TASKS_EAGER=False)
+class CoreTasksCommitTests(TransactionTestCase):
+
+    def test_task_enqueued_after_commit(self):
+        """Обработчик не видит задачу, пока транзакция не завершена."""
+        with transaction.atomic():
+            tasks.enqueue(record_call, 3)
+            self.assertFalse(Task.objects.exists())
+        self.assertEqual(
+            list(Task.objects.values_list('name', 'arguments')),
+            [(record_call.task_name, '[3]')],
+        )
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                tasks.enqueue(record_call, 4)
+                raise RuntimeError
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        """TASKS_EAGER: задача выполняется после коммита, без очереди."""
+        CALLS.clear()
+        with transaction.atomic():
+            tasks.enqueue(record_call, 2)
+            self.assertEqual(CALLS, [])
+        self.assertEqual(CALLS, [2])
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                tasks.enqueue(record_call, 5)
+                raise RuntimeError
+        self.assertEqual(CALLS, [2])
+        self.assertFalse(Task.objects.exists())
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import lru, metrics, tasks
+
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
@@ -15,3 +19,13 @@ def page_not_found(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def metrics_view(request):
+    return HttpResponse(
+        metrics.prometheus()
+        + metrics.queue_prometheus(tasks.queue_stats())
+        + metrics.lru_prometheus(lru.registered_stats()),
+        content_type='text/plain; version=0.0.4'
+    )
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        # Модули задач регистрируют их в core.tasks при импорте.
+        from . import signals, tasks, thumbnails  # noqa: F401
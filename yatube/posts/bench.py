@@ -0,0 +1,332 @@
+"""
+Нагрузочный стенд: генерация синтетических данных и замер страниц.
+"""
+import collections
+import datetime
+import itertools
+import math
+import random
+import time
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts import urls as posts_urls
+from users import urls as users_urls
+
+from .cache import SITE, bump
+from .counters import create_missing_stats, reconcile
+from .feed import rebuild_feeds
+from .models import Comment, Follow, Group, Post, User
+from .search import rebuild_index
+from .trending import rebuild_trending
+from .utils import BATCH_SIZE
+
+BENCH_PREFIX: str = 'bench'
+# Параметр распределения Парето для популярности авторов: чем меньше,
+# тем сильнее перекос (немногие авторы собирают большинство подписчиков).
+POPULARITY_ALPHA: float = 1.2
+# Посты равномерно распределены по этому периоду до текущего момента.
+PERIOD = datetime.timedelta(days=365)
+WORDS: tuple = (
+    'лето', 'море', 'город', 'книга', 'музыка', 'поход', 'кофе', 'работа',
+    'друзья', 'фильм', 'дорога', 'осень', 'проект', 'спорт', 'кошка',
+    'новости', 'утро', 'вечер', 'рецепт', 'путешествие',
+)
+
+# Представления, которые нельзя вызывать GET-запросом на стенде:
+# удаление поста и выход из аккаунта ломают следующие замеры, а
+# подписка и отписка меняют данные и сбрасывают кеш посреди замеров.
+SKIP_URLS: tuple = (
+    'posts:post_delete', 'users:logout',
+    'posts:profile_follow', 'posts:profile_unfollow',
+)
+# Без кеша страниц и карточек: замеряется полный рендеринг.
+NO_CACHE: dict = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    },
+    'POST_CARD_CACHE': False,
+}
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def _new_rows(model, start_pk):
+    return list(model.objects.filter(pk__gt=start_pk).order_by('pk'))
+
+
+def _max_pk(model):
+    return model.objects.aggregate(pk=Max('pk'))['pk'] or 0
+
+
+def seed(users=1000, groups=20, posts=10000, comments=20000,
+         follows=20000, seed=0, progress=None):
+    """
+    Создает синтетические данные с реалистичным перекосом.
+        Популярность авторов распределена по Парето: она определяет
+        и число подписчиков, и число постов автора.
+        progress(message) вызывается после каждого этапа.
+    Возвращает словарь {модель: число созданных строк}.
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    now = timezone.now()
+    offset = User.objects.filter(
+        username__startswith=f'{BENCH_PREFIX}_'
+    ).count()
+
+    start_pk = _max_pk(User)
+    new_users = []
+    for i in range(users):
+        user = User(username=f'{BENCH_PREFIX}_{offset + i}')
+        user.set_unusable_password()
+        new_users.append(user)
+    User.objects.bulk_create(new_users, batch_size=BATCH_SIZE)
+    new_users = _new_rows(User, start_pk)
+    popularity = list(itertools.accumulate(
+        rng.paretovariate(POPULARITY_ALPHA) for _ in new_users
+    ))
+    create_missing_stats()
+    report(f'Пользователи: {len(new_users)}')
+
+    start_pk = _max_pk(Group)
+    Group.objects.bulk_create(
+        (
+            Group(
+                title=f'Группа {offset + i}',
+                slug=f'{BENCH_PREFIX}-{offset + i}',
+                description=_text(rng, 10),
+            ) for i in range(groups)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    new_groups = _new_rows(Group, start_pk) + [None]
+    report(f'Группы: {len(new_groups) - 1}')
+
+    start_pk = _max_pk(Post)
+    authors = rng.choices(new_users, cum_weights=popularity, k=posts)
+    Post.objects.bulk_create(
+        (
+            Post(
+                author=author,
+                group=rng.choice(new_groups),
+                text=_text(rng, rng.randint(5, 50)),
+            ) for author in authors
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    # pub_date задается auto_now_add, поэтому даты меняются отдельно.
+    new_posts = _new_rows(Post, start_pk)
+    for post in new_posts:
+        post.pub_date = now - PERIOD * rng.random()
+    Post.objects.bulk_update(new_posts, ['pub_date'], batch_size=BATCH_SIZE)
+    report(f'Посты: {len(new_posts)}')
+
+    if new_posts:
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post=rng.choice(new_posts),
+                    author=rng.choice(new_users),
+                    text=_text(rng, rng.randint(3, 20)),
+                ) for _ in range(comments)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    report(f'Комментарии: {comments if new_posts else 0}')
+
+    # Повторные и собственные подписки отбрасываются, поэтому кандидатов
+    # берется с запасом.
+    edges = set()
+    candidates = zip(
+        rng.choices(new_users, k=follows * 3),
+        rng.choices(new_users, cum_weights=popularity, k=follows * 3),
+    )
+    for user, author in candidates:
+        if len(edges) >= follows:
+            break
+        if user != author:
+            edges.add((user.pk, author.pk))
+    Follow.objects.bulk_create(
+        (Follow(user_id=user, author_id=author) for user, author in edges),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    report(f'Подписки: {len(edges)}')
+
+    reconcile()
+    rebuild_feeds()
+    report('Счетчики и ленты заполнены')
+    rebuild_index()
+    report('Поисковый индекс перестроен')
+    rebuild_trending()
+    report('Оценки популярности пересчитаны')
+    bump(SITE)
+    return {
+        'users': len(new_users),
+        'groups': len(new_groups) - 1,
+        'posts': len(new_posts),
+        'comments': comments if new_posts else 0,
+        'follows': len(edges),
+    }
+
+
+def synthetic_graph(users, follows, groups, posts, seed=0):
+    """
+    Граф подписок и постов в памяти - для замеров без базы данных.
+        Популярность авторов распределена по Парето, как в seed.
+    Возвращает (пары (user, author) по возрастанию user,
+    строки (author, group, число постов)).
+    """
+    rng = random.Random(seed)
+    people = range(1, users + 1)
+    popularity = list(itertools.accumulate(
+        rng.paretovariate(POPULARITY_ALPHA) for _ in people
+    ))
+    edges = set()
+    while len(edges) < follows:
+        for user, author in zip(
+            rng.choices(people, k=follows),
+            rng.choices(people, cum_weights=popularity, k=follows),
+        ):
+            if user != author:
+                edges.add((user, author))
+                if len(edges) >= follows:
+                    break
+    post_groups = collections.Counter(zip(
+        rng.choices(people, cum_weights=popularity, k=posts),
+        rng.choices(range(1, groups + 1), k=posts),
+    ))
+    return sorted(edges), [
+        (author, group, count)
+        for (author, group), count in post_groups.items()
+    ]
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    values = sorted(values)
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def bench_urls(user):
+    """
+    Адреса всех страниц posts и users, кроме SKIP_URLS.
+        Параметры берутся из данных пользователя user: его пост,
+        группа поста и самый популярный из других авторов.
+    """
+    post = user.posts.select_related('group').first() or Post.objects.first()
+    group = (post and post.group) or Group.objects.first()
+    author = (
+        User.objects.exclude(pk=user.pk).order_by(
+            '-stats__followers_count'
+        ).first() or user
+    )
+    arguments = {
+        'group_slug': group and group.slug,
+        'username': author.username,
+        'post_id': post and post.pk,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+    urls = []
+    for module in (posts_urls, users_urls):
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {
+                key: arguments[key] for key in pattern.pattern.converters
+            }
+            if name in SKIP_URLS or None in kwargs.values():
+                continue
+            urls.append((name, reverse(name, kwargs=kwargs)))
+    return urls
+
+
+def measure(client, url, repeat=20, cold=False):
+    """Время ответа (мс), число запросов к БД и размер ответа."""
+    timings, queries = [], []
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            # Потоковый ответ (RSS) формируется при чтении.
+            content = (
+                b''.join(response.streaming_content) if response.streaming
+                else response.content
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+    return {
+        'url': url,
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'queries': percentile(queries, 50),
+        'bytes': len(content),
+    }
+
+
+def run_benchmark(user, repeat=20, cold=False, progress=None):
+    """
+    Замеряет все страницы анонимом и пользователем user.
+        cold - очищать кеш перед каждым запросом.
+    Возвращает отчет, пригодный для json.dump.
+    """
+    anonymous, authorized = Client(), Client()
+    authorized.force_login(user)
+    results = []
+    for client_name, client in (
+        ('anonymous', anonymous), ('user', authorized)
+    ):
+        for name, url in bench_urls(user):
+            result = {
+                'name': name,
+                'client': client_name,
+                **measure(client, url, repeat, cold),
+            }
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        'created': timezone.now().isoformat(),
+        'repeat': repeat,
+        'cold': cold,
+        'user': user.username,
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    """Изменение p50 и числа запросов относительно прошлого отчета."""
+    previous = {
+        (result['client'], result['name']): result
+        for result in baseline['results']
+    }
+    changes = []
+    for result in report['results']:
+        old = previous.get((result['client'], result['name']))
+        if old is None:
+            continue
+        changes.append({
+            'name': result['name'],
+            'client': result['client'],
+            'p50_ms': round(result['p50_ms'] - old['p50_ms'], 2),
+            'queries': result['queries'] - old['queries'],
+        })
+    return changes
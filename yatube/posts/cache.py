@@ -0,0 +1,314 @@
+import hashlib
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from core import metrics
+from core.db import has_replica, use_primary
+
+from .models import Post
+
+GENERATION_PREFIX = 'posts:gen'
+# Копия страницы для конкретных поколений лент: значение по ключу
+# не меняется, поэтому его можно держать и в памяти процесса.
+PAGE_PREFIX = 'posts:page'
+# Последняя копия страницы любых поколений - для отдачи во время
+# пересборки.
+STALE_PREFIX = 'posts:stale'
+LOCK_PREFIX = 'posts:lock'
+# Метка недавнего изменения ленты: живет REPLICA_LAG секунд.
+BUMPED_PREFIX = 'posts:bumped'
+AUTHOR_OF_PREFIX = 'posts:author_of'
+# Страницы сбрасываются событиями, а таймаут лишь ограничивает память.
+PAGE_TIMEOUT: int = 60 * 60
+PAGE_TIMEOUT_JITTER: int = 5 * 60
+LOCK_TIMEOUT: int = 10
+LOCK_WAIT: float = 2.0
+LOCK_POLL: float = 0.05
+
+SITE = 'site'
+INDEX = 'index'
+# Оценки популярности: сдвигается при каждом их изменении.
+TRENDING = 'trending'
+
+CARD_PREFIX = 'posts:card'
+CARD_TIMEOUT: int = 24 * 60 * 60
+# Карточка поста выглядит по-разному в зависимости от страницы:
+# в профиле не выводится автор, на странице группы - группа.
+CARD_VARIANTS: dict = {
+    'posts:profile_detail': 'profile',
+    'posts:group_detail': 'group',
+}
+CARD_DEFAULT_VARIANT = 'feed'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def _generation_key(scope):
+    return f'{GENERATION_PREFIX}:{scope}'
+
+
+def _initial_generation():
+    # Начальное значение от времени: если ключ вытеснен из кеша,
+    # новое поколение не совпадет со старыми записями страниц.
+    return time.time_ns()
+
+
+def get_generations(scopes):
+    """Текущие поколения набора лент одним обращением к кешу."""
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_generation(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def bump(*scopes):
+    """Сдвигает поколения лент: их страницы в кеше устаревают."""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), None)
+    if has_replica() and scopes:
+        cache.set_many(
+            dict.fromkeys(
+                (f'{BUMPED_PREFIX}:{scope}' for scope in scopes), True
+            ),
+            settings.REPLICA_LAG,
+        )
+
+
+def recently_bumped(scopes):
+    """
+    Менялась ли какая-то из лент за последние REPLICA_LAG секунд.
+        Страница, построенная по отстающей реплике, сохранилась бы
+        в кеше под новым поколением и отдавалась бы до следующего.
+    """
+    if not has_replica():
+        return False
+    return bool(
+        cache.get_many([f'{BUMPED_PREFIX}:{scope}' for scope in scopes])
+    )
+
+
+def post_scopes(post, old_group_slug=None):
+    """Ленты, в которых выводится пост."""
+    scopes = [INDEX, author_scope(post.author.username), post_scope(post.pk)]
+    if post.group is not None:
+        scopes.append(group_scope(post.group.slug))
+    if old_group_slug is not None:
+        scopes.append(group_scope(old_group_slug))
+    return scopes
+
+
+def post_detail_scopes(request, post_id):
+    """Страница поста зависит от поста и от профиля его автора."""
+    key = f'{AUTHOR_OF_PREFIX}:{post_id}'
+    username = cache.get(key)
+    if username is None:
+        username = Post.objects.filter(
+            pk=post_id
+        ).values_list('author__username', flat=True).first()
+        if username is None:
+            return (post_scope(post_id),)
+        cache.set(key, username, None)
+    return post_scope(post_id), author_scope(username)
+
+
+def card_variant(view_name):
+    return CARD_VARIANTS.get(view_name, CARD_DEFAULT_VARIANT)
+
+
+def card_key(post_id, updated, variant, generation):
+    """
+    Ключ карточки поста.
+        updated меняется при правке поста, generation (поколение SITE) -
+        при изменении групп и пользователей, которые выводятся в карточке.
+    """
+    return (
+        f'{CARD_PREFIX}:{variant}:{post_id}:{updated.timestamp()}:{generation}'
+    )
+
+
+def delete_cards(post_id, updated):
+    """Удаляет все варианты карточки поста с данной датой изменения."""
+    generation, = get_generations((SITE,))
+    cache.delete_many([
+        card_key(post_id, updated, variant, generation)
+        for variant in (*CARD_VARIANTS.values(), CARD_DEFAULT_VARIANT)
+    ])
+
+
+def _request_key(request):
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    raw = f'{request.get_full_path()}|{user}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _page_key(request_key, generations):
+    digest = hashlib.md5(repr(generations).encode()).hexdigest()
+    return f'{PAGE_PREFIX}:{request_key}:{digest}'
+
+
+def _is_cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.cookies
+        # Страница с CSRF-токеном привязана к cookie конкретного браузера.
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _save(keys, generations, content, content_type):
+    entry = (generations, content, content_type)
+    cache.set_many(
+        dict.fromkeys(keys, entry),
+        PAGE_TIMEOUT + random.randint(0, PAGE_TIMEOUT_JITTER)
+    )
+
+
+def _tee(chunks, save):
+    """
+    Отдает части потокового ответа и сохраняет ответ целиком, когда
+    он отдан до конца: оборванная передача в кеш не попадает.
+    """
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    save(b''.join(parts))
+
+
+def _from_entry(entry):
+    # По индексам: записи прежнего формата были длиннее.
+    return HttpResponse(entry[1], content_type=entry[2])
+
+
+def _etag(request, generations):
+    """
+    Слабый ETag страницы: поколения ее лент, пользователь и CSRF-cookie.
+        Слабый - потому что токен CSRF в форме маскируется заново
+        при каждом рендеринге.
+    """
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    raw = f'{generations}|{user}|{csrf}|{request.get_full_path()}'
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def _set_etag(response, etag):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+    return response
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def versioned_cache_page(get_scopes, conditional=False):
+    """
+    Кеширует GET-страницу до изменения лент, от которых она зависит.
+        get_scopes(request, *args, **kwargs) возвращает список лент.
+        С conditional ответ получает ETag, а условный запрос - 304 без
+        рендеринга. Last-Modified не отдается: страница меняется и без
+        новых записей (правки, удаления, подписки, комментарии), а дата
+        сдвига поколения нигде не хранится.
+    Пока страницу пересобирает один воркер (single-flight блокировка),
+    остальные отдают устаревшую копию или ждут готовую.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            scopes = (SITE, *get_scopes(request, *args, **kwargs))
+            generations = get_generations(scopes)
+            request_key = _request_key(request)
+            key = _page_key(request_key, generations)
+            entry = cache.get(key)
+            fresh = entry is not None
+
+            etag = None
+            if conditional:
+                # ETag меняется вместе с поколениями, поэтому правки и
+                # удаления видны, хотя дата новой записи от них не меняется.
+                etag = _etag(request, generations)
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    return _set_etag(response, etag)
+
+            def validated(response):
+                if etag is None:
+                    return response
+                return _set_etag(response, etag)
+
+            if fresh:
+                metrics.record_cache(hit=True)
+                return validated(_from_entry(entry))
+
+            lock_key = f'{LOCK_PREFIX}:{request_key}'
+            stale_key = f'{STALE_PREFIX}:{request_key}'
+            locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+            if not locked:
+                entry = cache.get(stale_key)
+                if entry is not None:
+                    # Устаревшая копия - без валидаторов текущего поколения.
+                    metrics.record_cache(hit=True)
+                    return _from_entry(entry)
+                entry = _wait_for(key)
+                if entry is not None:
+                    metrics.record_cache(hit=True)
+                    return validated(_from_entry(entry))
+            metrics.record_cache(hit=False)
+            try:
+                if recently_bumped(scopes):
+                    with use_primary():
+                        response = view(request, *args, **kwargs)
+                else:
+                    response = view(request, *args, **kwargs)
+                if _is_cacheable(request, response):
+                    def save(content):
+                        _save(
+                            (key, stale_key), generations, content,
+                            response['Content-Type'],
+                        )
+
+                    if response.streaming:
+                        response.streaming_content = _tee(
+                            response.streaming_content, save
+                        )
+                    else:
+                        save(response.content)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return validated(response)
+        return wrapper
+    return decorator
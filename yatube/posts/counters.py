@@ -0,0 +1,93 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .utils import BATCH_SIZE
+
+# Счетчик -> (модель со счетчиком, поле, модель событий, поле связи).
+COUNTERS: tuple = (
+    (Group, 'posts_count', Post, 'group'),
+    (Post, 'comments_count', Comment, 'post'),
+    (UserStats, 'posts_count', Post, 'author'),
+    (UserStats, 'followers_count', Follow, 'author'),
+    (UserStats, 'following_count', Follow, 'user'),
+)
+
+
+def change(queryset, field, delta=1):
+    """Атомарно сдвигает счетчик: UPDATE ... SET field = field + delta."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user_stats(user_id, field, delta=1):
+    stats = UserStats.objects.filter(user_id=user_id)
+    if not change(stats, field, delta) and delta > 0 and not stats.exists():
+        # Строки статистики нет - создаем ее сразу с точными значениями.
+        UserStats.objects.get_or_create(user_id=user_id)
+        reconcile(stats)
+
+
+def get_user_stats(user):
+    """Статистика пользователя; недостающая строка создается и считается."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        UserStats.objects.get_or_create(user=user)
+        reconcile(UserStats.objects.filter(user=user))
+        user.stats = UserStats.objects.get(user=user)
+        return user.stats
+
+
+def _actual_count(model, source, source_field):
+    pk_field = 'user' if model is UserStats else 'pk'
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{source_field: OuterRef(pk_field)}
+            ).order_by().values(
+                source_field
+            ).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+def reconcile(queryset=None):
+    """
+    Пересчитывает счетчики и исправляет расхождения.
+        queryset - ограничивает пересчет строками одной модели.
+    Возвращает словарь {счетчик: число исправленных строк}.
+    """
+    fixed = {}
+    for model, field, source, source_field in COUNTERS:
+        if queryset is not None and queryset.model is not model:
+            continue
+        rows = queryset if queryset is not None else model.objects.all()
+        drifted = list(
+            rows.annotate(
+                actual=_actual_count(model, source, source_field)
+            ).exclude(
+                **{field: F('actual')}
+            ).values_list('pk', 'actual')
+        )
+        model.objects.bulk_update(
+            [model(pk=pk, **{field: actual}) for pk, actual in drifted],
+            [field],
+            batch_size=BATCH_SIZE,
+        )
+        fixed[f'{model.__name__}.{field}'] = len(drifted)
+    return fixed
+
+
+def create_missing_stats():
+    """Создает строки статистики для пользователей, у которых их нет."""
+    users = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
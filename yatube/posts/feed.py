@@ -0,0 +1,218 @@
+import itertools
+import operator
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import FeedEntry, Follow, Post, User, UserStats
+from .utils import BATCH_SIZE
+
+# Автор с таким числом подписчиков переходит на чтение: его посты не
+# раскладываются по лентам при публикации, а подмешиваются при запросе.
+FANOUT_LIMIT: int = 10000
+# Обратно к раскладке - только когда подписчиков меньше PUSH_LIMIT:
+# автор у порога не переключается туда и обратно с каждой подпиской.
+PUSH_LIMIT: int = 8000
+# Подписчиков в одной задаче дозаполнения лент после возврата к раскладке.
+FOLLOWERS_PER_TASK: int = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_LIMIT: int = 1000
+FEED_ORDERING: tuple = ('feed_date', 'feed_post')
+
+
+def is_fanout_author(author):
+    """Раскладываются ли посты автора по лентам подписчиков."""
+    return not UserStats.objects.filter(
+        user=author, pull_since__isnull=False
+    ).exists()
+
+
+def switch_to_pull(author_id):
+    """Переводит автора на чтение, если подписчиков стало FANOUT_LIMIT."""
+    return UserStats.objects.filter(
+        user_id=author_id,
+        pull_since__isnull=True,
+        followers_count__gte=FANOUT_LIMIT,
+    ).update(pull_since=timezone.now())
+
+
+def switch_to_push(author_id):
+    """
+    Возвращает автора к раскладке, если подписчиков меньше PUSH_LIMIT.
+        Возвращает момент перехода на чтение - посты с него нужно
+        разложить по лентам, - или None, если автор не переключен.
+    """
+    stats = UserStats.objects.filter(
+        user_id=author_id,
+        pull_since__isnull=False,
+        followers_count__lt=PUSH_LIMIT,
+    )
+    since = stats.values_list('pull_since', flat=True).first()
+    # Условный UPDATE: из одновременных отписок переключает одна.
+    if since is None or not stats.filter(pull_since=since).update(
+        pull_since=None
+    ):
+        return None
+    return since
+
+
+def sync_modes():
+    """Переключает авторов по счетчикам - после импорта и пересчета."""
+    UserStats.objects.filter(
+        pull_since__isnull=True, followers_count__gte=FANOUT_LIMIT
+    ).update(pull_since=timezone.now())
+    UserStats.objects.filter(
+        pull_since__isnull=False, followers_count__lt=PUSH_LIMIT
+    ).update(pull_since=None)
+
+
+def _bulk_add(entries):
+    # bulk_create собирает все объекты в список, поэтому поток записей
+    # передается ему пачками.
+    entries = iter(entries)
+    while True:
+        batch = list(itertools.islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_add(
+        FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def backfill_feed(user, author):
+    """Заполняет ленту последними постами автора после подписки."""
+    if not is_fanout_author(author):
+        return
+    posts = author.posts.values_list(
+        'pk', 'pub_date'
+    ).order_by('-pub_date')[:BACKFILL_LIMIT]
+    _bulk_add(
+        FeedEntry(user=user, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts
+    )
+
+
+def backfill_followers(author, since, after=0):
+    """
+    Раскладывает посты автора, опубликованные с since - пока они
+    читались при запросе, - по лентам FOLLOWERS_PER_TASK подписчиков
+    с user_id больше after.
+    Возвращает последний обработанный user_id или None, если
+    подписчики закончились.
+    """
+    if not is_fanout_author(author):
+        # Автор снова читается при запросе - дозаполнять нечего.
+        return None
+    posts = list(
+        author.posts.filter(pub_date__gte=since).values_list(
+            'pk', 'pub_date'
+        ).order_by('-pub_date')[:BACKFILL_LIMIT]
+    )
+    followers = list(
+        Follow.objects.filter(author=author, user_id__gt=after).order_by(
+            'user_id'
+        ).values_list('user_id', flat=True)[:FOLLOWERS_PER_TASK]
+    )
+    _bulk_add(
+        FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for user_id in followers
+        for pk, pub_date in posts
+    )
+    if len(followers) < FOLLOWERS_PER_TASK:
+        return None
+    return followers[-1]
+
+
+def prune_feed(user, author):
+    """Убирает из ленты посты автора после отписки."""
+    FeedEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def _by_author(rows):
+    return itertools.groupby(rows, key=operator.itemgetter(0))
+
+
+def rebuild_feeds():
+    """
+    Заполняет ленты всех подписчиков так же, как backfill_feed при
+    подписке. Для данных, созданных в обход сигналов и представлений.
+        Подписки и посты читаются двумя потоками, упорядоченными по
+        автору, и сливаются: в памяти только посты текущего автора.
+    """
+    sync_modes()
+    pull = set(
+        User.objects.filter(
+            stats__pull_since__isnull=False
+        ).values_list('pk', flat=True)
+    )
+    followers = _by_author(
+        Follow.objects.exclude(author__in=pull).order_by(
+            'author'
+        ).values_list('author_id', 'user_id').iterator(chunk_size=BATCH_SIZE)
+    )
+    posts = _by_author(
+        Post.objects.order_by('author', '-pub_date').values_list(
+            'author_id', 'pk', 'pub_date'
+        ).iterator(chunk_size=BATCH_SIZE)
+    )
+
+    def entries():
+        author_posts = next(posts, None)
+        for author_id, follows in followers:
+            while author_posts is not None and author_posts[0] < author_id:
+                author_posts = next(posts, None)
+            if author_posts is None:
+                return
+            if author_posts[0] != author_id:
+                continue
+            latest = list(itertools.islice(author_posts[1], BACKFILL_LIMIT))
+            for _, user_id in follows:
+                for _, pk, pub_date in latest:
+                    yield FeedEntry(
+                        user_id=user_id, post_id=pk, pub_date=pub_date
+                    )
+
+    _bulk_add(entries())
+
+
+def pull_authors(user):
+    """Авторы из подписок пользователя, чьи посты читаются при запросе."""
+    return list(
+        Follow.objects.filter(
+            user=user, author__stats__pull_since__isnull=False
+        ).values_list('author_id', flat=True)
+    )
+
+
+def get_feed(user):
+    """
+    Посты ленты подписок.
+        Обычный случай - диапазон индекса (user, -pub_date) в FeedEntry.
+        Если пользователь подписан на авторов с огромной аудиторией,
+        их посты добавляются к ленте при чтении.
+    Поля feed_date и feed_post - ключ курсорной пагинации (FEED_ORDERING),
+    совпадающий с индексом FeedEntry.
+    """
+    authors = pull_authors(user)
+    if not authors:
+        return Post.objects.filter(
+            feed_entries__user=user
+        ).annotate(
+            feed_date=F('feed_entries__pub_date'),
+            feed_post=F('feed_entries__post'),
+        )
+    return Post.objects.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('post'))
+        | Q(author__in=authors)
+    ).annotate(feed_date=F('pub_date'), feed_post=F('pk'))
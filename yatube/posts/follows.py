@@ -0,0 +1,100 @@
+"""
+Граф подписок.
+    followed_authors отвечает, на кого из списка авторов подписан
+    пользователь: по множеству его подписок из кеша или одним запросом.
+    follow - один INSERT, гонку двух одинаковых подписок разрешает
+    ограничение unique_following. unfollow удаляет строку, заблокировав
+    ее, поэтому сигналы получает только одна из одновременных отписок.
+    Счетчики, ленты и кеш страниц обновляют сигналы Follow.
+    Множество подписок хранится под поколением пользователя: если его
+    прочитали до подписки, а записали в кеш после, оно ляжет под старым
+    поколением и не будет прочитано.
+"""
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .cache import bump, get_generations
+from .models import Follow
+
+FOLLOWING_PREFIX = 'posts:following'
+FOLLOWING_TIMEOUT: int = 60 * 60
+# Больше подписок целиком не кешируется: для такого пользователя
+# проверка идет запросом по списку авторов.
+FOLLOWING_CACHE_MAX: int = 5000
+# Значение в кеше для пользователя с подписками сверх FOLLOWING_CACHE_MAX.
+_TOO_MANY = 'too-many'
+
+
+def following_scope(user_id):
+    return f'following:{user_id}'
+
+
+def _following_set(user_id):
+    generation, = get_generations((following_scope(user_id),))
+    key = f'{FOLLOWING_PREFIX}:{user_id}:{generation}'
+    following = cache.get(key)
+    if following is None:
+        author_ids = list(
+            Follow.objects.filter(user_id=user_id).values_list(
+                'author_id', flat=True
+            )[:FOLLOWING_CACHE_MAX + 1]
+        )
+        following = (
+            frozenset(author_ids)
+            if len(author_ids) <= FOLLOWING_CACHE_MAX else _TOO_MANY
+        )
+        cache.set(key, following, FOLLOWING_TIMEOUT)
+    return following
+
+
+def followed_authors(user, author_ids):
+    """Множество id авторов из author_ids, на которых подписан user."""
+    author_ids = frozenset(author_ids)
+    if not user.is_authenticated or not author_ids:
+        return frozenset()
+    following = _following_set(user.pk)
+    if following == _TOO_MANY:
+        return frozenset(
+            Follow.objects.filter(
+                user=user, author_id__in=author_ids
+            ).values_list('author_id', flat=True)
+        )
+    return following & author_ids
+
+
+def is_following(user, author):
+    return author.pk in followed_authors(user, (author.pk,))
+
+
+def forget(user_ids):
+    """Сбрасывает кеш подписок после изменений в обход сигналов."""
+    bump(*(following_scope(user_id) for user_id in user_ids))
+
+
+def follow(user, author):
+    """Подписывает user на author. True - если подписки еще не было."""
+    if user.pk == author.pk:
+        return False
+    try:
+        # Точка сохранения: ошибка не прерывает внешнюю транзакцию.
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author):
+    """Отписывает user от author. True - если подписка была."""
+    with transaction.atomic():
+        # Строка блокируется до удаления: из двух одновременных отписок
+        # ее найдет и получит сигналы (и счетчики) только первая.
+        subscription = Follow.objects.select_for_update().filter(
+            user=user, author=author
+        ).first()
+        if subscription is None:
+            return False
+        # Сигналам нужны имена обоих - они уже загружены.
+        subscription.user, subscription.author = user, author
+        deleted, _ = subscription.delete()
+    return bool(deleted)
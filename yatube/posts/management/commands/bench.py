@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bench import compare, run_benchmark
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p99 времени ответа, число запросов и размер всех '
+        'страниц posts и users. Отчет сохраняется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--user',
+            help='Пользователь для авторизованных замеров. '
+                 'По умолчанию - пользователь с наибольшим числом подписок.'
+        )
+        parser.add_argument('--output', default='bench.json')
+        parser.add_argument(
+            '--compare', metavar='REPORT',
+            help='Прошлый отчет для сравнения.'
+        )
+
+    def get_user(self, username):
+        if username is not None:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Нет пользователя {username}')
+        user = User.objects.order_by('-stats__following_count').first()
+        if user is None:
+            raise CommandError('Нет пользователей, запустите seed_bench')
+        return user
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(
+                '{client:9} {name:28} {status} p50 {p50_ms:8.2f} ms  '
+                'p99 {p99_ms:8.2f} ms  {queries:3} q  {bytes:7} B'.format(
+                    **result
+                )
+            )
+
+        report = run_benchmark(
+            self.get_user(options['user']),
+            repeat=options['repeat'],
+            cold=options['cold'],
+            progress=progress,
+        )
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Отчет сохранен в {options["output"]}'
+        ))
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            for change in compare(report, baseline):
+                style = (
+                    self.style.WARNING if change['queries'] > 0
+                    else self.style.SUCCESS
+                )
+                self.stdout.write(style(
+                    '{client:9} {name:28} p50 {p50_ms:+8.2f} ms  '
+                    '{queries:+3} q'.format(**change)
+                ))
@@ -0,0 +1,66 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.bench import synthetic_graph
+from posts.recommendations import PARTITIONS, Recommender, by_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер пакетного расчета рекомендаций на синтетическом графе '
+        'подписок в памяти, без базы данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=1000000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--partitions', type=int, default=PARTITIONS)
+
+    def stage(self, name, start):
+        # ru_maxrss в Linux - в килобайтах.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f'{name:30} {time.perf_counter() - start:8.2f} с '
+            f'{peak:8.0f} МБ'
+        )
+        return time.perf_counter()
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        edges, author_groups = synthetic_graph(
+            options['users'], options['follows'], options['groups'],
+            options['posts'], options['seed'],
+        )
+        start = self.stage(f'граф: {len(edges)} подписок', start)
+
+        recommender = Recommender(author_groups)
+        followings = list(by_user(edges))
+        parts = options['partitions']
+        for part in range(parts):
+            for user, authors in followings:
+                recommender.add_following(user, authors, part, parts)
+            pairs = len(recommender.pairs)
+            recommender.collect()
+            start = self.stage(f'пары авторов, часть {part}: {pairs}', start)
+
+        recommender.build()
+        start = self.stage(
+            f'соседи: {len(recommender.neighbors)} авторов', start
+        )
+
+        stored = users = 0
+        for user, authors in followings:
+            recommended = recommender.recommend(user, authors)
+            if recommended:
+                users += 1
+                stored += len(','.join(map(str, recommended)))
+        self.stage(f'рекомендации: {users} польз.', start)
+        self.stdout.write(
+            f'Хранение: {stored / 1024 / 1024:.1f} МБ, '
+            f'{stored / max(users, 1):.0f} байт на пользователя'
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import export
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON построчно, не загружая таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл выгрузки. По умолчанию - стандартный вывод.'
+        )
+
+    def handle(self, *args, **options):
+        # Ход выгрузки - в stderr, чтобы не смешивать его с данными.
+        def progress(record_type, count):
+            self.stderr.write(f'{record_type}: {count}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                counts = export(out, progress)
+        else:
+            counts = export(self.stdout, progress)
+        self.stderr.write(self.style.SUCCESS(
+            ', '.join(f'{name}: {count}' for name, count in counts.items())
+        ))
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.transfer import import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками. Пользователи, группы '
+        'и подписки, которые уже есть, пропускаются; посты и комментарии '
+        'при повторной загрузке создаются заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл NDJSON или "-" для стандартного ввода.'
+        )
+
+    def load(self, lines):
+        def progress(record_type, count):
+            self.stdout.write(f'{record_type}: {count}')
+
+        try:
+            with transaction.atomic():
+                return import_lines(lines, progress)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            created, skipped = self.load(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                created, skipped = self.load(lines)
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: ' + ', '.join(
+                f'{name}: {count}' for name, count in created.items()
+            )
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                'Пропущено: ' + ', '.join(
+                    f'{name}: {count}' for name, count in skipped.items()
+                )
+            ))
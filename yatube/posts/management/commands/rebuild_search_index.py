@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов, комментариев и групп.'
+
+    def handle(self, *args, **options):
+        def progress(model, count):
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+
+        with transaction.atomic():
+            rebuild_index(progress)
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import rebuild_recommendations
+
+STAGES: dict = {
+    'pairs': 'Пары авторов',
+    'neighbors': 'Авторы с соседями',
+    'users': 'Пользователи с рекомендациями',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации авторов по совместным подпискам '
+        'и группам. Запускается по расписанию, например раз в сутки.'
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(stage, count):
+            self.stdout.write(
+                f'{STAGES[stage]}: {count} '
+                f'({time.perf_counter() - start:.1f} с)'
+            )
+
+        saved = rebuild_recommendations(progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации сохранены для {saved} пользователей '
+            f'за {time.perf_counter() - start:.1f} с'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import create_missing_stats, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики постов и подписок.'
+
+    def handle(self, *args, **options):
+        create_missing_stats()
+        for counter, fixed in reconcile().items():
+            style = self.style.WARNING if fixed else self.style.SUCCESS
+            self.stdout.write(style(f'{counter}: исправлено {fixed}'))
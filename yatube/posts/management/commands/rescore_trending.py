@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает оценки популярности постов и групп по публикациям '
+        'и комментариям. Обычно они обновляются событиями; команда нужна '
+        'после миграции и для исправления расхождений.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            posts, groups = rebuild_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки пересчитаны: постов {posts}, групп {groups}'
+        ))
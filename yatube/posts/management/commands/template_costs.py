@@ -0,0 +1,115 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import base
+from django.test import Client, override_settings
+
+from core.template_cache import django_engines, template_names
+from posts.bench import NO_CACHE, bench_urls
+from posts.models import User
+
+class RenderTimer:
+    """
+    Собственное время рендеринга каждого шаблона: без вложенных
+    include и родительских шаблонов, которые замеряются отдельно.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.own_time = defaultdict(float)
+        self._children = []
+
+    def __enter__(self):
+        self._original = original = base.Template._render
+        timer = self
+
+        def _render(template, context):
+            timer._children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(template, context)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = timer._children.pop()
+                if timer._children:
+                    timer._children[-1] += elapsed
+                timer.calls[template.name] += 1
+                timer.own_time[template.name] += elapsed - children
+
+        base.Template._render = _render
+        return self
+
+    def __exit__(self, *exc_info):
+        base.Template._render = self._original
+
+
+class Command(BaseCommand):
+    help = (
+        'Время компиляции каждого шаблона проекта и собственное время '
+        'его рендеринга на страницах posts и users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--user',
+            help='Пользователь для авторизованных страниц. '
+                 'По умолчанию - пользователь с наибольшим числом подписок.'
+        )
+
+    def compile_costs(self, repeat):
+        costs = {}
+        for engine in django_engines():
+            for name in template_names(engine):
+                _, origin = engine.find_template(name)
+                with open(origin.name, encoding=engine.file_charset) as file:
+                    source = file.read()
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    engine.from_string(source)
+                costs[name] = (time.perf_counter() - start) / repeat
+        return costs
+
+    def render_costs(self, user, repeat):
+        anonymous, authorized = Client(), Client()
+        authorized.force_login(user)
+        urls = [url for _, url in bench_urls(user)]
+        with override_settings(**NO_CACHE), RenderTimer() as timer:
+            for _ in range(repeat):
+                for client in (anonymous, authorized):
+                    for url in urls:
+                        client.get(url)
+        return timer
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.order_by('-stats__following_count').first()
+        if user is None:
+            raise CommandError('Нет пользователя для авторизованных страниц')
+
+        repeat = options['repeat']
+        compile_costs = self.compile_costs(repeat)
+        timer = self.render_costs(user, repeat)
+
+        self.stdout.write(
+            f'{"шаблон":40} {"компиляция, мс":>15} {"рендеринги":>11} '
+            f'{"рендеринг, мс":>14}'
+        )
+        # Только шаблоны проекта: шаблоны Django и debug_toolbar не
+        # оптимизируются здесь.
+        names = sorted(
+            compile_costs,
+            key=lambda name: timer.own_time.get(name, 0),
+            reverse=True,
+        )
+        for name in names:
+            calls = timer.calls.get(name, 0)
+            own = timer.own_time.get(name, 0) / calls * 1000 if calls else 0
+            compile_ms = compile_costs[name] * 1000
+            self.stdout.write(
+                f'{name:40} {compile_ms:15.3f} '
+                f'{calls // repeat:11} {own:14.3f}'
+            )
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.19 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_retina',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Превью картинки для retina'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_small',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Малое превью картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_thumb',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Превью картинки'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    # Ограничение unique_following не применялось: повторные подписки
+    # удаляются, а счетчики уменьшаются на число удаленных строк.
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = Follow.objects.order_by().values('user', 'author').annotate(
+        keep=models.Min('pk'), count=models.Count('pk')
+    ).filter(count__gt=1)
+    for row in duplicates:
+        Follow.objects.filter(
+            user=row['user'], author=row['author']
+        ).exclude(pk=row['keep']).delete()
+        extra = row['count'] - 1
+        UserStats.objects.filter(user=row['author']).update(
+            followers_count=models.F('followers_count') - extra
+        )
+        UserStats.objects.filter(user=row['user']).update(
+            following_count=models.F('following_count') - extra
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_following'),
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='follow_user_author_idx',
+        ),
+    ]
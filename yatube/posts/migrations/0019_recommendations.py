@@ -0,0 +1,32 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0018_follow_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendations',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('authors', models.TextField(verbose_name='Авторы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата расчета')),
+            ],
+            options={
+                'verbose_name': 'Рекомендации авторов',
+                'verbose_name_plural': 'Рекомендации авторов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(fields=['-followers_count'], name='userstats_followers_idx'),
+        ),
+    ]
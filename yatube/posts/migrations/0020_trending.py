@@ -0,0 +1,31 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Оценка популярности'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Оценка популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-trending_score'], name='group_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trending_score', '-id'], name='post_trending_idx'),
+        ),
+    ]
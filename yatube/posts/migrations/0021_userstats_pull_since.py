@@ -0,0 +1,34 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+# posts.feed.FANOUT_LIMIT на момент миграции.
+FANOUT_LIMIT = 10000
+
+
+def fill_pull_since(apps, schema_editor):
+    # Когда автор перешел на чтение, неизвестно: при возврате к раскладке
+    # его посты дозаполнятся с регистрации (не больше BACKFILL_LIMIT).
+    UserStats = apps.get_model('posts', 'UserStats')
+    rows = UserStats.objects.filter(
+        followers_count__gte=FANOUT_LIMIT
+    ).select_related('user')
+    for stats in rows:
+        stats.pull_since = stats.user.date_joined
+        stats.save(update_fields=['pull_since'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='pull_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Лента читается при запросе с'),
+        ),
+        migrations.RunPython(fill_pull_since, migrations.RunPython.noop),
+    ]
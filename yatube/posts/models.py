@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.shortcuts import reverse
 
 
@@ -7,7 +8,30 @@ User = get_user_model()
 COUNT_CHARS: int = 30
 
 
-class Group(models.Model):
+class CountersModel(models.Model):
+    """
+    Модель с денормализованными счетчиками.
+        Счетчики меняются только F()-выражениями (posts.counters),
+        поэтому save() существующей записи их не перезаписывает.
+    """
+    counter_fields: tuple = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CountersModel):
+    counter_fields = ('posts_count', 'trending_score')
+
     title = models.CharField(
         max_length=200,
         verbose_name='Название',
@@ -20,10 +44,26 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание',
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов',
+    )
+    # Логарифм затухающей оценки популярности (posts.trending).
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Оценка популярности',
+    )
 
     class Meta:
         verbose_name = 'Группа'
         verbose_name_plural = 'Группы'
+        indexes = [
+            models.Index(
+                fields=['-trending_score'], name='group_trending_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title}'
@@ -35,8 +75,9 @@ class Group(models.Model):
         )
 
 
-class Post(models.Model):
+class Post(CountersModel):
     C_CHARS_SHORT_TEXT = 100
+    counter_fields = ('comments_count', 'trending_score')
 
     text = models.TextField(
         verbose_name='Текст поста',
@@ -46,6 +87,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -66,11 +111,59 @@ class Post(models.Model):
         upload_to='posts/',
         verbose_name='Картинка'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+    )
+    # Логарифм затухающей оценки популярности (posts.trending).
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Оценка популярности',
+    )
+    image_thumb = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Превью картинки',
+    )
+    image_small = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Малое превью картинки',
+    )
+    image_retina = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Превью картинки для retina',
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        # Ключ пагинации лент - (pub_date, id), поэтому id в конце индексов.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='post_trending_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.text[:COUNT_CHARS]}'
@@ -81,6 +174,16 @@ class Post(models.Model):
             kwargs={'post_id': self.pk}
         )
 
+    def thumbnails(self):
+        """URL готовых превью или None, пока они генерируются."""
+        if not self.image_thumb:
+            return None
+        return {
+            'thumb': default_storage.url(self.image_thumb),
+            'small': default_storage.url(self.image_small),
+            'retina': default_storage.url(self.image_retina),
+        }
+
     def short_text(self):
         if len(str(self.text)) <= self.C_CHARS_SHORT_TEXT:
             return self.text
@@ -109,6 +212,12 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:COUNT_CHARS]
@@ -136,10 +245,167 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
-        constraints = models.UniqueConstraint(
-            fields=['user', 'author'],
-            name='unique_following'
-        )
+        # Уникальный индекс ограничения обслуживает и выборку подписок
+        # пользователя: отдельный индекс по (user, author) не нужен.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_following'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок',
+    )
+    # Пока задано, посты автора не раскладываются по лентам подписчиков,
+    # а читаются при запросе (posts.feed).
+    pull_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Лента читается при запросе с',
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+        indexes = [
+            # Самые популярные авторы - рекомендации для новичков.
+            models.Index(
+                fields=['-followers_count'], name='userstats_followers_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Статистика {self.user}'
+
+
+class UserRecommendations(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    # id авторов через запятую по убыванию оценки: одна короткая строка
+    # на пользователя вместо строки на каждую пару.
+    authors = models.TextField(
+        verbose_name='Авторы',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата расчета',
+    )
+
+    class Meta:
+        verbose_name = 'Рекомендации авторов'
+        verbose_name_plural = 'Рекомендации авторов'
+
+    def __str__(self):
+        return f'Рекомендации для {self.user}'
+
+
+class SearchEntry(models.Model):
+    term = models.CharField(
+        max_length=50,
+        verbose_name='Основа слова',
+    )
+    weight = models.PositiveSmallIntegerField(
+        verbose_name='Вес',
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Пост',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Комментарий',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Группа',
+    )
+
+    class Meta:
+        verbose_name = 'Запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+            models.Index(
+                fields=['term', 'group'], name='search_term_group_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.term
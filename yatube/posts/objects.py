@@ -0,0 +1,77 @@
+"""
+Горячие объекты в памяти процесса: пост с автором и группой, группа по slug.
+    Вместе с объектом хранятся поколения лент (posts.cache), в которых
+    он выводится. Правка в любом воркере сдвигает поколение, и копия
+    перестает совпадать. Без этой проверки страница, пересобранная после
+    правки, попала бы в кеш под новым поколением со старыми данными.
+    Сигналы сохранения и удаления убирают копии этого процесса сразу.
+    Объект хранится в pickle: каждый запрос получает свою копию,
+    и восстановление в несколько раз быстрее copy.deepcopy.
+"""
+import pickle
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+
+from core.lru import LRUCache
+
+from .cache import SITE, get_generations, group_scope, post_detail_scopes
+from .models import Group, Post
+
+posts = LRUCache(
+    settings.OBJECT_CACHE_POSTS, settings.OBJECT_CACHE_TIMEOUT, 'posts'
+)
+groups = LRUCache(
+    settings.OBJECT_CACHE_GROUPS, settings.OBJECT_CACHE_TIMEOUT, 'groups'
+)
+
+
+def _cached(lru, key, scopes, load):
+    if not settings.OBJECT_CACHE:
+        return load()
+    generations = get_generations(scopes())
+    data = lru.get(key, version=generations)
+    if data is None:
+        obj = load()
+        lru.set(
+            key,
+            pickle.dumps(obj, pickle.HIGHEST_PROTOCOL),
+            version=generations,
+        )
+        return obj
+    return pickle.loads(data)
+
+
+def get_post_or_404(post_id):
+    """Пост с автором, его счетчиками и группой."""
+    # Автор и группа выводятся на странице поста: их правка сдвигает
+    # поколение автора или сайта.
+    return _cached(
+        posts,
+        post_id,
+        lambda: (SITE, *post_detail_scopes(None, post_id)),
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__stats', 'group'),
+            pk=post_id,
+        ),
+    )
+
+
+def get_group_or_404(slug):
+    """Группа по slug со счетчиком постов."""
+    # Правка группы сдвигает поколение сайта, а новый или удаленный
+    # пост, от которого меняется posts_count, - поколение ленты группы.
+    return _cached(
+        groups,
+        slug,
+        lambda: (SITE, group_scope(slug)),
+        lambda: get_object_or_404(Group, slug=slug),
+    )
+
+
+def forget_post(post_id):
+    posts.delete(post_id)
+
+
+def forget_group(slug):
+    groups.delete(slug)
@@ -1,4 +1,5 @@
 INDEX_PAGE = 'posts:index'
+TRENDING_PAGE = 'posts:trending'
 FOLLOW_PAGE = 'posts:follow'
 GROUP_PAGE = 'posts:group_detail'
 PROFILE_PAGE = 'posts:profile_detail'
@@ -9,3 +10,7 @@ POST_DETAIL_PAGE = 'posts:post_detail'
 POST_COMMENT = 'posts:post_comment'
 POST_EDIT_PAGE = 'posts:post_edit'
 POST_DELETE = 'posts:post_delete'
+SEARCH_PAGE = 'posts:search'
+INDEX_RSS = 'posts:index_rss'
+GROUP_RSS = 'posts:group_rss'
+PROFILE_RSS = 'posts:profile_rss'
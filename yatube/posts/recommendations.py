@@ -0,0 +1,243 @@
+"""
+Рекомендации авторов: «Возможно, вам понравятся».
+    Считаются пакетно (команда recommend_authors) проходами по
+    подпискам, упорядоченным по пользователю, - в памяти не держится
+    весь граф.
+    1. По последним SAMPLE подпискам каждого пользователя считается,
+       сколько раз пары авторов встречаются вместе. Для каждого автора
+       остаются NEIGHBORS ближайших по косинусной мере. Пары считаются
+       по частям (PARTITIONS проходов) - память делится на число частей.
+    2. Оценка кандидата для пользователя - средняя близость к его
+       авторам плюс GROUP_WEIGHT * доля интересов пользователя в
+       INTEREST_GROUPS главных группах, где кандидат много пишет.
+       Уже известные авторы отбрасываются, TOP_K лучших сохраняются
+       одной строкой на пользователя.
+    Страница берет строку по ключу, а подписки, оформленные после
+    расчета, отсекает по кешу подписок (posts.follows).
+"""
+import heapq
+import math
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import bump, get_generations
+from .follows import followed_authors
+from .models import Follow, Post, User, UserRecommendations, UserStats
+from .utils import BATCH_SIZE
+
+TOP_K: int = 20
+SHOWN: int = 5
+SAMPLE: int = 20
+NEIGHBORS: int = 20
+# Пары, встреченные реже, считаются шумом и не хранятся в соседях.
+MIN_COFOLLOWS: int = 2
+GROUP_AUTHORS: int = 20
+INTEREST_GROUPS: int = 3
+GROUP_WEIGHT: float = 0.3
+PARTITIONS: int = 4
+# Пара авторов упаковывается в одно число: так словарь пар меньше.
+_PAIR_BASE = 1 << 32
+
+RECOMMENDATIONS = 'recommendations'
+RECOMMENDATIONS_PREFIX = 'posts:recs'
+RECOMMENDATIONS_TIMEOUT: int = 60 * 60
+
+
+class Recommender:
+    """
+    author_groups - строки (автор, группа, число постов).
+    Порядок работы: для каждой части - add_following для всех
+    пользователей и collect; затем build и recommend для каждого
+    пользователя.
+    """
+
+    def __init__(self, author_groups):
+        self.pairs = defaultdict(int)
+        self.appearances = defaultdict(int)
+        self._candidates = defaultdict(list)
+        self.neighbors = {}
+        # Автор -> [(группа, доля его постов)] в INTEREST_GROUPS главных
+        # группах; группа -> [(автор, вес)].
+        groups_of = defaultdict(list)
+        by_group = defaultdict(list)
+        totals = defaultdict(int)
+        for author, group, posts in author_groups:
+            groups_of[author].append((posts, group))
+            totals[author] += posts
+            by_group[group].append((posts, author))
+        self.groups_of = {
+            author: [
+                (group, posts / totals[author])
+                for posts, group in heapq.nlargest(INTEREST_GROUPS, rows)
+            ]
+            for author, rows in groups_of.items()
+        }
+        self.group_authors = {}
+        for group, rows in by_group.items():
+            top = heapq.nlargest(GROUP_AUTHORS, rows)
+            self.group_authors[group] = [
+                (author, posts / top[0][0]) for posts, author in top
+            ]
+
+    def add_following(self, user, authors, part=0, parts=1):
+        """
+        Первый проход: authors - подписки user, новые первыми.
+            Считаются пары, меньший автор которых попадает в часть part.
+        """
+        sample = sorted(authors[:SAMPLE])
+        if part == 0:
+            for author in sample:
+                self.appearances[author] += 1
+        for i, first in enumerate(sample):
+            if first % parts != part:
+                continue
+            base = first * _PAIR_BASE
+            for second in sample[i + 1:]:
+                self.pairs[base + second] += 1
+
+    def collect(self):
+        """Переносит частые пары текущей части в соседей авторов."""
+        candidates = self._candidates
+        appearances = self.appearances
+        changed = set()
+        for pair, count in self.pairs.items():
+            if count < MIN_COFOLLOWS:
+                continue
+            first, second = divmod(pair, _PAIR_BASE)
+            similarity = count / math.sqrt(
+                appearances[first] * appearances[second]
+            )
+            candidates[first].append((similarity, second))
+            candidates[second].append((similarity, first))
+            changed.update((first, second))
+        self.pairs = defaultdict(int)
+        for author in changed:
+            candidates[author] = heapq.nlargest(
+                NEIGHBORS, candidates[author]
+            )
+
+    def build(self):
+        """Фиксирует соседей после всех частей."""
+        self.neighbors = dict(self._candidates)
+        self._candidates = defaultdict(list)
+
+    def recommend(self, user, authors):
+        """Второй проход: TOP_K id авторов для user по убыванию оценки."""
+        sample = authors[:SAMPLE]
+        scores = defaultdict(float)
+        interest = defaultdict(float)
+        weight = 1 / len(sample)
+        for author in sample:
+            for similarity, candidate in self.neighbors.get(author, ()):
+                scores[candidate] += similarity * weight
+        for author in (user, *sample):
+            for group, share in self.groups_of.get(author, ()):
+                interest[group] += share
+        total = sum(interest.values())
+        for group, weight in heapq.nlargest(
+            INTEREST_GROUPS, interest.items(), key=itemgetter(1)
+        ):
+            for candidate, share in self.group_authors[group]:
+                scores[candidate] += GROUP_WEIGHT * weight / total * share
+        for author in authors:
+            scores.pop(author, None)
+        scores.pop(user, None)
+        best = heapq.nlargest(TOP_K, scores.items(), key=itemgetter(1))
+        return [author for author, _ in best]
+
+
+def by_user(edges):
+    """(user, [author, ...]) из пар, упорядоченных по пользователю."""
+    for user, rows in groupby(edges, key=itemgetter(0)):
+        yield user, [author for _, author in rows]
+
+
+def _edges():
+    # Внутри пользователя - новые подписки первыми.
+    return Follow.objects.order_by('user_id', '-pk').values_list(
+        'user_id', 'author_id'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+
+def _author_groups():
+    return Post.objects.filter(group__isnull=False).order_by().values_list(
+        'author_id', 'group_id'
+    ).annotate(posts=Count('pk')).iterator(chunk_size=BATCH_SIZE)
+
+
+def rebuild_recommendations(progress=None, partitions=PARTITIONS):
+    """
+    Пересчитывает рекомендации всех пользователей с подписками.
+        progress(stage, count) вызывается после этапов и пачек записи.
+    Возвращает число пользователей с рекомендациями.
+    """
+    report = progress or (lambda stage, count: None)
+    recommender = Recommender(_author_groups())
+    for part in range(partitions):
+        for user, authors in by_user(_edges()):
+            recommender.add_following(user, authors, part, partitions)
+        report('pairs', len(recommender.pairs))
+        recommender.collect()
+    recommender.build()
+    report('neighbors', len(recommender.neighbors))
+
+    saved = 0
+    with transaction.atomic():
+        UserRecommendations.objects.all().delete()
+        batch = []
+        for user, authors in by_user(_edges()):
+            recommended = recommender.recommend(user, authors)
+            if recommended:
+                batch.append(UserRecommendations(
+                    user_id=user, authors=','.join(map(str, recommended))
+                ))
+            if len(batch) >= BATCH_SIZE:
+                UserRecommendations.objects.bulk_create(batch)
+                saved += len(batch)
+                batch = []
+                report('users', saved)
+        UserRecommendations.objects.bulk_create(batch)
+        saved += len(batch)
+    report('users', saved)
+    bump(RECOMMENDATIONS)
+    return saved
+
+
+def _recommended_ids(user):
+    generation, = get_generations((RECOMMENDATIONS,))
+    key = f'{RECOMMENDATIONS_PREFIX}:{user.pk}:{generation}'
+    author_ids = cache.get(key)
+    if author_ids is None:
+        row = UserRecommendations.objects.filter(user=user).values_list(
+            'authors', flat=True
+        ).first()
+        if row:
+            author_ids = [int(author) for author in row.split(',')]
+        else:
+            # Новичку без подписок - самые популярные авторы.
+            author_ids = list(
+                UserStats.objects.order_by('-followers_count').values_list(
+                    'user_id', flat=True
+                )[:TOP_K]
+            )
+        cache.set(key, author_ids, RECOMMENDATIONS_TIMEOUT)
+    return author_ids
+
+
+def recommended_authors(user, limit=SHOWN):
+    """Авторы со счетчиками для блока рекомендаций, без уже известных."""
+    author_ids = _recommended_ids(user)
+    followed = followed_authors(user, author_ids)
+    author_ids = [
+        author for author in author_ids
+        if author != user.pk and author not in followed
+    ][:limit]
+    if not author_ids:
+        return []
+    authors = User.objects.select_related('stats').in_bulk(author_ids)
+    return [authors[author] for author in author_ids if author in authors]
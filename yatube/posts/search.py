@@ -0,0 +1,141 @@
+import re
+from collections import Counter
+
+from django.db.models import Sum
+
+from .models import Comment, Group, Post, SearchEntry
+from .stemmer import stem
+from .utils import BATCH_SIZE
+
+MAX_TERM_LENGTH: int = 50
+MAX_QUERY_TERMS: int = 10
+SEARCH_ORDERING: tuple = ('rank', 'pk')
+
+# Вес вхождения слова в зависимости от того, где оно найдено.
+WEIGHT_POST: int = 3
+WEIGHT_COMMENT: int = 1
+WEIGHT_GROUP_TITLE: int = 5
+WEIGHT_GROUP_DESCRIPTION: int = 2
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'вы', 'да', 'для', 'до',
+    'его', 'ее', 'ей', 'же', 'за', 'и', 'из', 'или', 'им', 'их', 'к', 'как',
+    'ко', 'ли', 'мне', 'мы', 'на', 'не', 'нет', 'но', 'о', 'об', 'он',
+    'она', 'они', 'от', 'по', 'при', 'с', 'со', 'так', 'то', 'ты', 'у',
+    'уже', 'что', 'это', 'я',
+))
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+
+
+def tokenize(text):
+    """Основы слов текста без стоп-слов."""
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        if CYRILLIC_RE.search(word):
+            word = stem(word)
+        if word:
+            terms.append(word[:MAX_TERM_LENGTH])
+    return terms
+
+
+def _entries(weighted_texts, **target):
+    counts = Counter()
+    for text, weight in weighted_texts:
+        for term in tokenize(text):
+            counts[term] += weight
+    return [
+        SearchEntry(term=term, weight=min(weight, 32767), **target)
+        for term, weight in counts.items()
+    ]
+
+
+def post_entries(post):
+    return _entries(((post.text, WEIGHT_POST),), post_id=post.pk)
+
+
+def comment_entries(comment):
+    return _entries(
+        ((comment.text, WEIGHT_COMMENT),),
+        post_id=comment.post_id,
+        comment_id=comment.pk,
+    )
+
+
+def group_entries(group):
+    return _entries(
+        (
+            (group.title, WEIGHT_GROUP_TITLE),
+            (group.description, WEIGHT_GROUP_DESCRIPTION),
+        ),
+        group_id=group.pk,
+    )
+
+
+def index_post(post):
+    """Переиндексирует текст поста; слова комментариев не трогает."""
+    SearchEntry.objects.filter(post=post, comment__isnull=True).delete()
+    SearchEntry.objects.bulk_create(post_entries(post), batch_size=BATCH_SIZE)
+
+
+def index_comment(comment):
+    SearchEntry.objects.filter(comment=comment).delete()
+    SearchEntry.objects.bulk_create(
+        comment_entries(comment), batch_size=BATCH_SIZE
+    )
+
+
+def index_group(group):
+    SearchEntry.objects.filter(group=group).delete()
+    SearchEntry.objects.bulk_create(
+        group_entries(group), batch_size=BATCH_SIZE
+    )
+
+
+def rebuild_index(progress=None):
+    """
+    Строит индекс заново пачками по BATCH_SIZE объектов.
+        progress(model, count) вызывается после каждой пачки.
+    """
+    SearchEntry.objects.all().delete()
+    sources = (
+        (Group, group_entries),
+        (Post, post_entries),
+        (Comment, comment_entries),
+    )
+    for model, get_entries in sources:
+        entries, count = [], 0
+        for obj in model.objects.order_by().iterator(chunk_size=BATCH_SIZE):
+            entries.extend(get_entries(obj))
+            count += 1
+            if count % BATCH_SIZE == 0:
+                SearchEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+                entries = []
+                if progress is not None:
+                    progress(model, count)
+        SearchEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        if progress is not None:
+            progress(model, count)
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def search_posts(query):
+    """
+    Посты, где найдено хотя бы одно слово запроса (в тексте поста или
+    в комментариях к нему). Поле rank - сумма весов найденных слов,
+    вместе с pk оно образует ключ курсорной пагинации (SEARCH_ORDERING).
+    """
+    return Post.objects.filter(
+        search_entries__term__in=query_terms(query)
+    ).annotate(rank=Sum('search_entries__weight'))
+
+
+def search_groups(query):
+    return Group.objects.filter(
+        search_entries__term__in=query_terms(query)
+    ).annotate(rank=Sum('search_entries__weight')).order_by('-rank', 'pk')
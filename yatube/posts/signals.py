@@ -0,0 +1,184 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import cache, counters, feed, follows, objects, tasks, trending
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """
+    Запоминает прежнюю группу поста, чтобы сбросить и её ленту,
+    и прежнюю дату изменения, чтобы удалить старые карточки.
+    """
+    instance._old_group_id = instance._old_group_slug = None
+    instance._old_updated = None
+    if instance.pk is not None:
+        (
+            instance._old_group_id,
+            instance._old_group_slug,
+            instance._old_updated,
+        ) = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'group__slug', 'updated'
+        ).first() or (None, None, None)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    cache.bump(*cache.post_scopes(
+        instance, getattr(instance, '_old_group_slug', None)
+    ))
+    objects.forget_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_old_cards(sender, instance, created, **kwargs):
+    if not created and instance._old_updated is not None:
+        cache.delete_cards(instance.pk, instance._old_updated)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_cards(sender, instance, **kwargs):
+    cache.delete_cards(instance.pk, instance.updated)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    groups = Group.objects.filter(pk=instance.group_id)
+    if created:
+        counters.change_user_stats(instance.author_id, 'posts_count')
+        counters.change(groups, 'posts_count')
+    elif instance._old_group_id != instance.group_id:
+        counters.change(
+            Group.objects.filter(pk=instance._old_group_id), 'posts_count', -1
+        )
+        counters.change(groups, 'posts_count')
+
+
+@receiver(post_save, sender=Post)
+def score_post(sender, instance, created, **kwargs):
+    if created:
+        trending.record_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change_user_stats(instance.author_id, 'posts_count', -1)
+    counters.change(
+        Group.objects.filter(pk=instance.group_id), 'posts_count', -1
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    cache.bump(cache.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change(
+            Post.objects.filter(pk=instance.post_id), 'comments_count'
+        )
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.record_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.change(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    # Профили обоих выводят счетчики: подписчиков автора и подписок
+    # читателя.
+    cache.bump(
+        cache.author_scope(instance.author.username),
+        cache.author_scope(instance.user.username),
+    )
+    follows.forget((instance.user_id,))
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_stats(instance.author_id, 'followers_count')
+        counters.change_user_stats(instance.user_id, 'following_count')
+
+
+@receiver(post_save, sender=Follow)
+def score_follow(sender, instance, created, **kwargs):
+    if created:
+        trending.record_follower(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change_user_stats(instance.author_id, 'followers_count', -1)
+    counters.change_user_stats(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def switch_to_pull(sender, instance, created, **kwargs):
+    if created:
+        feed.switch_to_pull(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def refill_feeds(sender, instance, **kwargs):
+    # Автор вернулся к раскладке: посты, которые читались при запросе,
+    # должны лечь в ленты подписчиков.
+    since = feed.switch_to_push(instance.author_id)
+    if since is not None:
+        enqueue(
+            tasks.backfill_followers, instance.author_id, since.isoformat()
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    # Название группы выводится в карточках постов на всех страницах.
+    cache.bump(cache.SITE)
+    objects.forget_group(instance.slug)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, update_fields, **kwargs):
+    # Вход пользователя обновляет только last_login - страницы не меняются.
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    cache.bump(cache.SITE)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    enqueue(tasks.index_post, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    enqueue(tasks.index_comment, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def index_group(sender, instance, **kwargs):
+    enqueue(tasks.index_group, instance.pk)
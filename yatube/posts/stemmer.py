@@ -0,0 +1,134 @@
+"""
+Стеммер русского языка по алгоритму Snowball (М. Портер).
+    https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+)
+SUPERLATIVE = ('ейш', 'ейше')
+DERIVATIONAL = ('ост', 'ость')
+
+
+def _by_length(endings):
+    return sorted(endings, key=len, reverse=True)
+
+
+def _grouped(groups):
+    """Окончания первой группы должны идти после 'а' или 'я'."""
+    first, second = groups
+    return _by_length(
+        [(ending, True) for ending in first]
+        + [(ending, False) for ending in second]
+    )
+
+
+_PERFECTIVE_GERUND = _grouped(PERFECTIVE_GERUND)
+_ADJECTIVE = _by_length(ADJECTIVE)
+_PARTICIPLE = _grouped(PARTICIPLE)
+_REFLEXIVE = _by_length(REFLEXIVE)
+_VERB = _grouped(VERB)
+_NOUN = _by_length(NOUN)
+_SUPERLATIVE = _by_length(SUPERLATIVE)
+_DERIVATIONAL = _by_length(DERIVATIONAL)
+
+
+def _strip(word, endings):
+    for ending in endings:
+        if word.endswith(ending):
+            return word[:-len(ending)]
+    return None
+
+
+def _strip_grouped(word, endings):
+    for ending, after_a in endings:
+        if not word.endswith(ending):
+            continue
+        stem = word[:-len(ending)]
+        if not after_a or stem.endswith(('а', 'я')):
+            return stem
+    return None
+
+
+def _region(word):
+    """Индекс начала части слова после первого сочетания гласная+согласная."""
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа русского слова в нижнем регистре."""
+    word = word.replace('ё', 'е')
+    rv_start = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), len(word)
+    )
+    r1_start = _region(word)
+    r2_start = r1_start + _region(word[r1_start:])
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное/глагол/сущ.
+    stripped = _strip_grouped(rv, _PERFECTIVE_GERUND)
+    if stripped is not None:
+        rv = stripped
+    else:
+        stripped = _strip(rv, _REFLEXIVE)
+        if stripped is not None:
+            rv = stripped
+        adjective = _strip(rv, _ADJECTIVE)
+        if adjective is not None:
+            participle = _strip_grouped(adjective, _PARTICIPLE)
+            rv = participle if participle is not None else adjective
+        else:
+            stripped = _strip_grouped(rv, _VERB)
+            if stripped is None:
+                stripped = _strip(rv, _NOUN)
+            if stripped is not None:
+                rv = stripped
+
+    # Шаг 2
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательное окончание в R2
+    r2 = max(r2_start - rv_start, 0)
+    if len(rv) > r2:
+        stripped = _strip(rv[r2:], _DERIVATIONAL)
+        if stripped is not None:
+            rv = rv[:r2] + stripped
+
+    # Шаг 4
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        stripped = _strip(rv, _SUPERLATIVE)
+        if stripped is not None:
+            rv = stripped[:-1] if stripped.endswith('нн') else stripped
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
@@ -0,0 +1,75 @@
+"""
+RSS 2.0 для ленты сайта, групп и авторов.
+    Посты читаются одним запросом values() без моделей, а XML отдается
+    потоком по элементу: ответ не собирается в памяти целиком.
+"""
+from xml.sax.saxutils import escape, quoteattr
+
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+FEED_LIMIT: int = 20
+TITLE_CHARS: int = 60
+CONTENT_TYPE = 'application/rss+xml; charset=utf-8'
+FEED_FIELDS: tuple = (
+    'pk', 'text', 'pub_date', 'author__username', 'group__title',
+)
+
+
+def feed_rows(queryset):
+    """Последние FEED_LIMIT постов - только поля для элементов ленты."""
+    return list(queryset.values(*FEED_FIELDS)[:FEED_LIMIT])
+
+
+def _tag(name, value):
+    return f'<{name}>{escape(str(value))}</{name}>'
+
+
+def _item(request, row):
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', args=[row['pk']])
+    )
+    parts = [
+        '<item>',
+        _tag('title', Truncator(row['text']).chars(TITLE_CHARS)),
+        _tag('link', link),
+        f'<guid isPermaLink="true">{escape(link)}</guid>',
+        _tag('pubDate', http_date(row['pub_date'].timestamp())),
+        _tag('dc:creator', row['author__username']),
+        _tag('description', row['text']),
+    ]
+    if row['group__title']:
+        parts.append(_tag('category', row['group__title']))
+    parts.append('</item>\n')
+    return ''.join(parts)
+
+
+def _stream(request, title, link, description, rows):
+    self_link = request.build_absolute_uri()
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+        + _tag('title', title)
+        + _tag('link', request.build_absolute_uri(link))
+        + _tag('description', description)
+        + '<language>ru</language>'
+        + f'<atom:link href={quoteattr(self_link)} rel="self" '
+          'type="application/rss+xml"/>'
+    )
+    if rows:
+        yield _tag('lastBuildDate', http_date(rows[0]['pub_date'].timestamp()))
+    yield '\n'
+    for row in rows:
+        yield _item(request, row)
+    yield '</channel></rss>\n'
+
+
+def rss_response(request, title, link, description, queryset):
+    """Потоковый ответ с лентой из последних постов queryset."""
+    return StreamingHttpResponse(
+        _stream(request, title, link, description, feed_rows(queryset)),
+        content_type=CONTENT_TYPE,
+    )
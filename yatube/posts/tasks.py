@@ -0,0 +1,69 @@
+"""
+Фоновые задачи постов: ленты подписчиков и поисковый индекс.
+    Задача получает идентификаторы и сама читает объекты: к моменту
+    запуска их могли изменить или удалить.
+"""
+from django.utils.dateparse import parse_datetime
+
+from core.tasks import enqueue, task
+
+from . import feed, search
+from .models import Comment, Follow, Group, Post, User
+
+
+def _get(model, pk):
+    return model.objects.filter(pk=pk).order_by().first()
+
+
+@task
+def fan_out_post(post_id):
+    post = _get(Post, post_id)
+    if post is not None:
+        feed.fan_out_post(post)
+
+
+@task
+def backfill_feed(user_id, author_id):
+    # Пока задача ждала в очереди, пользователь мог уже отписаться.
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        feed.backfill_feed(_get(User, user_id), _get(User, author_id))
+
+
+@task
+def backfill_followers(author_id, since, after=0):
+    # Подписчики обходятся частями: каждая часть - своя задача.
+    author = _get(User, author_id)
+    if author is None:
+        return
+    last = feed.backfill_followers(author, parse_datetime(since), after)
+    if last is not None:
+        enqueue(backfill_followers, author_id, since, last)
+
+
+@task
+def prune_feed(user_id, author_id):
+    if not Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).exists():
+        feed.prune_feed(user_id, author_id)
+
+
+@task
+def index_post(post_id):
+    post = _get(Post, post_id)
+    if post is not None:
+        search.index_post(post)
+
+
+@task
+def index_comment(comment_id):
+    comment = _get(Comment, comment_id)
+    if comment is not None:
+        search.index_comment(comment)
+
+
+@task
+def index_group(group_id):
+    group = _get(Group, group_id)
+    if group is not None:
+        search.index_group(group)
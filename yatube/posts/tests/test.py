@@ -1,3 +1,7 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.test import TestCase, Client
 from django.urls import reverse_lazy
 
@@ -50,6 +54,7 @@ class PostsTestCase(TestCase):
 
         cls.INDEX_PAGE = reverse_lazy(pages.INDEX_PAGE)
         cls.FOLLOW_PAGE = reverse_lazy(pages.FOLLOW_PAGE)
+        cls.TRENDING_PAGE = reverse_lazy(pages.TRENDING_PAGE)
         cls.GROUP_PAGE = reverse_lazy(pages.GROUP_PAGE,
                                       args=[cls.group.slug])
         cls.PROFILE_PAGE = reverse_lazy(pages.PROFILE_PAGE,
@@ -68,7 +73,35 @@ class PostsTestCase(TestCase):
         cls.POST_DELETE = reverse_lazy(pages.POST_DELETE,
                                        args=[cls.post.pk])
 
+    @contextmanager
+    def captureOnCommitCallbacks(self, using=DEFAULT_DB_ALIAS, execute=False):
+        """
+        Собирает колбэки on_commit блока и, если execute, выполняет их.
+            Тест идет в незавершаемой транзакции, поэтому задачи
+            (core.tasks) сами не запускаются. Повторяет метод TestCase
+            из Django 3.2+.
+        """
+        callbacks = []
+        connection = connections[using]
+        start = len(connection.run_on_commit)
+        try:
+            yield callbacks
+        finally:
+            # Колбэк может поставить новые задачи - выполняем и их.
+            while True:
+                end = len(connection.run_on_commit)
+                for _, callback in connection.run_on_commit[start:end]:
+                    callbacks.append(callback)
+                    if execute:
+                        callback()
+                if not execute or end == len(connection.run_on_commit):
+                    break
+                start = end
+
     def setUp(self):
+        # Страницы кешируются, а база между тестами откатывается
+        cache.clear()
+
         # Создаем неавторизованный клиент
         self.client = Client()
         self.client.name = 'Anonymous'
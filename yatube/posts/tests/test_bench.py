@@ -0,0 +1,50 @@
+from .test import PostsTestCase
+from posts.bench import SKIP_URLS, bench_urls, percentile, run_benchmark, seed
+from posts.counters import reconcile
+from posts.models import FeedEntry, Follow, Post
+
+
+class PostsBenchTests(PostsTestCase):
+    def test_seed(self):
+        """Синтетические данные согласованы со счетчиками и лентами."""
+        posts_before = Post.objects.count()
+        created = seed(
+            users=20, groups=3, posts=60, comments=30, follows=40, seed=1
+        )
+        self.assertEqual(created['users'], 20)
+        self.assertEqual(Post.objects.count() - posts_before, 60)
+        self.assertEqual(Follow.objects.count(), created['follows'])
+        self.assertFalse(any(reconcile().values()))
+
+        follow = Follow.objects.filter(author__posts__isnull=False).first()
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=follow.user, post__author=follow.author
+            ).exists()
+        )
+
+        created = seed(users=5, posts=0, comments=0, follows=0)
+        self.assertEqual(created['users'], 5)
+
+    def test_run_benchmark(self):
+        """Отчет содержит все страницы для анонима и пользователя."""
+        Follow.objects.create(user=self.user, author=self.author)
+        follows = list(Follow.objects.values_list('user', 'author'))
+        report = run_benchmark(self.user, repeat=2)
+        names = {name for name, _ in bench_urls(self.user)}
+        self.assertFalse(names & set(SKIP_URLS))
+        self.assertEqual(len(report['results']), 2 * len(names))
+        for result in report['results']:
+            with self.subTest(name=result['name'], client=result['client']):
+                self.assertLess(result['status'], 500)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(Post.objects.count(), self.COUNT_POSTS_TEST)
+        self.assertEqual(
+            list(Follow.objects.values_list('user', 'author')), follows
+        )
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
@@ -0,0 +1,123 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+
+from .test import PostsTestCase
+from posts.cache import INDEX, author_scope, recently_bumped
+from posts.counters import create_missing_stats
+from posts.models import Comment, Follow, Post
+
+
+class PostsCacheTests(PostsTestCase):
+    def test_index_cached_until_new_post(self):
+        """Главная отдается из кеша, пока не появится новый пост."""
+        response = self.client.get(self.INDEX_PAGE)
+        self.assertIsNotNone(response.context)
+
+        response = self.client.get(self.INDEX_PAGE)
+        self.assertIsNone(response.context)
+
+        Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(self.INDEX_PAGE)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_group_change_invalidates_both_groups(self):
+        """Перенос поста сбрасывает страницы старой и новой группы."""
+        old_group, new_group = self.groups
+        post = old_group.posts.first()
+        self.client.get(self.GROUP_PAGE)
+
+        post.group = new_group
+        post.save()
+        response = self.client.get(self.GROUP_PAGE)
+        self.assertIsNotNone(response.context)
+
+    def test_comment_invalidates_post_detail(self):
+        """Новый комментарий сразу виден на странице поста."""
+        self.client.get(self.POST_DETAIL_PAGE)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        response = self.client.get(self.POST_DETAIL_PAGE)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_follow_invalidates_both_profiles(self):
+        """Подписка сразу видна в профилях автора и читателя."""
+        create_missing_stats()
+        profile = reverse('posts:profile_detail', args=[self.user.username])
+        self.client.get(profile)
+        self.client.get(self.PROFILE_PAGE)
+
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.client.get(profile)
+        self.assertEqual(response.context['author'].stats.following_count, 1)
+        self.assertContains(response, 'Подписок: 1')
+        response = self.client.get(self.PROFILE_PAGE)
+        self.assertEqual(response.context['author'].stats.followers_count, 1)
+
+    def test_page_with_csrf_token_not_cached(self):
+        """Страница с формой комментария не кешируется."""
+        self.client_user.get(self.POST_DETAIL_PAGE)
+        response = self.client_user.get(self.POST_DETAIL_PAGE)
+        self.assertIsNotNone(response.context)
+
+    def test_conditional_get(self):
+        """Условный запрос получает 304 без рендеринга страницы."""
+        for client, url in (
+            (self.client, self.INDEX_PAGE),
+            (self.client, self.GROUP_PAGE),
+            (self.client, self.PROFILE_PAGE),
+            (self.client, self.POST_DETAIL_PAGE),
+            (self.client_user, self.POST_DETAIL_PAGE),
+        ):
+            with self.subTest(address=url, client=client.name):
+                # Первый ответ может выдать CSRF-cookie, а она входит в ETag.
+                client.get(url)
+                cache.clear()
+                response = client.get(url)
+                etag = response['ETag']
+                self.assertFalse(response.has_header('Last-Modified'))
+
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertFalse(response.templates)
+
+    def test_etag_changes_with_feed(self):
+        """Правка поста меняет ETag, хотя даты постов прежние."""
+        etag = self.client.get(self.INDEX_PAGE)['ETag']
+        self.assertNotEqual(
+            etag, self.client_user.get(self.INDEX_PAGE)['ETag']
+        )
+
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.client.get(self.INDEX_PAGE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_after_edit(self):
+        """Одна дата не дает 304 на страницу, измененную правкой."""
+        response = self.client.get(
+            self.INDEX_PAGE, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        post = response.context['page_obj'][0]
+        post.text = 'Исправленный текст'
+        post.save()
+        response = self.client.get(
+            self.INDEX_PAGE, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Исправленный текст')
+
+    @mock.patch('posts.cache.has_replica', return_value=True)
+    def test_recently_bumped_feed_read_from_primary(self, has_replica):
+        """Измененная только что лента строится не по реплике."""
+        scopes = (INDEX, author_scope(self.author.username))
+        self.assertFalse(recently_bumped(scopes))
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertTrue(recently_bumped(scopes))
+        self.assertFalse(recently_bumped((author_scope('other'),)))
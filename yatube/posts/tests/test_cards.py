@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from .test import PostsTestCase
+from posts import pages
+from posts.cache import SITE, card_key, get_generations
+from posts.models import Post
+from posts.search import rebuild_index
+from posts.utils import PAGINATE_BY
+
+
+class PostsCardsTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        rebuild_index()
+        # Поиск не кешируется целиком, поэтому видны кеши карточек.
+        self.SEARCH_PAGE = reverse(pages.SEARCH_PAGE)
+        self.query = {'q': 'тестовый'}
+
+    def card(self, post, variant='feed'):
+        generation, = get_generations((SITE,))
+        return cache.get(card_key(post.pk, post.updated, variant, generation))
+
+    def test_cards_served_from_cache(self):
+        """Повторный рендеринг ленты берет карточки из кеша."""
+        response = self.client.get(self.SEARCH_PAGE, self.query)
+        self.assertIn(
+            f'frag;desc="0/{PAGINATE_BY} hit"', response['Server-Timing']
+        )
+        response = self.client.get(self.SEARCH_PAGE, self.query)
+        self.assertIn(
+            f'frag;desc="{PAGINATE_BY}/{PAGINATE_BY} hit"',
+            response['Server-Timing']
+        )
+
+    @override_settings(POST_CARD_CACHE=False)
+    def test_cards_cache_switch(self):
+        """Кеш карточек можно отключить."""
+        self.client.get(self.SEARCH_PAGE, self.query)
+        response = self.client.get(self.SEARCH_PAGE, self.query)
+        self.assertNotIn('frag;', response['Server-Timing'])
+
+    def test_edit_and_delete_drop_cards(self):
+        """Правка и удаление поста удаляют его карточки."""
+        post = Post.objects.order_by('-pub_date', '-pk').first()
+        self.client.get(self.INDEX_PAGE)
+        self.client.get(reverse(pages.GROUP_PAGE, args=[post.group.slug]))
+        self.assertIn(post.group.title, self.card(post))
+        self.assertNotIn(post.group.title, self.card(post, 'group'))
+
+        old_updated = post.updated
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertNotEqual(post.updated, old_updated)
+        generation, = get_generations((SITE,))
+        self.assertIsNone(
+            cache.get(card_key(post.pk, old_updated, 'feed', generation))
+        )
+        self.assertContains(
+            self.client.get(self.INDEX_PAGE), 'Исправленный пост'
+        )
+
+        post.delete()
+        self.assertIsNone(self.card(post))
@@ -0,0 +1,59 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from .test import PostsTestCase
+from posts.counters import get_user_stats, reconcile
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+
+class CountersTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('recount_stats', stdout=StringIO())
+
+    def test_counters_follow_writes(self):
+        """Счетчики меняются вместе с постами, комментариями и подписками."""
+        group = Group.objects.get(pk=self.group.pk)
+        posts_count = get_user_stats(self.author).posts_count
+
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text='Ком')
+        Follow.objects.create(user=self.user, author=self.author)
+
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, posts_count + 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).following_count, 1
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        self.assertEqual(
+            Group.objects.get(pk=group.pk).posts_count, group.posts_count + 1
+        )
+
+        post.delete()
+        Follow.objects.all().delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, posts_count)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_save_does_not_overwrite_counters(self):
+        """Сохранение старой копии поста не затирает счетчик."""
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=post, author=self.user, text='Ком')
+        post.text = 'Отредактированный пост'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        """Команда пересчета исправляет разошедшиеся счетчики."""
+        UserStats.objects.filter(user=self.author).update(posts_count=0)
+        fixed = reconcile()
+        self.assertEqual(fixed['UserStats.posts_count'], 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count,
+            self.author.posts.count()
+        )
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from .test import PostsTestCase
+from posts import pages, tasks
+from posts.counters import create_missing_stats
+from posts.feed import get_feed, is_fanout_author
+from posts.models import FeedEntry, Follow, Post, User
+
+
+class FeedTests(PostsTestCase):
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка очищает."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_user.get(self.PROFILE_FOLLOW)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(),
+            self.author.posts.count()
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_user.get(self.PROFILE_UNFOLLOW)
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+
+    def test_queued_backfill_skipped_after_unfollow(self):
+        """Задача из очереди не заполняет ленту, если подписки уже нет."""
+        tasks.backfill_feed(self.user.pk, self.author.pk)
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+
+        Follow.objects.create(user=self.user, author=self.author)
+        tasks.backfill_feed(self.user.pk, self.author.pk)
+        tasks.prune_feed(self.user.pk, self.author.pk)
+        self.assertTrue(FeedEntry.objects.filter(user=self.user).exists())
+
+    def test_new_post_fans_out_and_delete_cleans_up(self):
+        """Новый пост попадает в ленты подписчиков и удаляется из них."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_author.post(
+                self.POST_CREATE_PAGE, data={'text': 'Пост для ленты'}
+            )
+        post = Post.objects.get(text='Пост для ленты')
+        self.assertIn(post, get_feed(self.user))
+
+        self.client_author.get(reverse(pages.POST_DELETE, args=[post.pk]))
+        self.assertFalse(FeedEntry.objects.filter(post_id=post.pk).exists())
+
+    def test_popular_author_is_read_on_request(self):
+        """Посты популярного автора не раскладываются, а читаются."""
+        with mock.patch('posts.feed.FANOUT_LIMIT', 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client_user.get(self.PROFILE_FOLLOW)
+            self.assertFalse(
+                FeedEntry.objects.filter(user=self.user).exists()
+            )
+            self.assertEqual(
+                get_feed(self.user).count(), self.author.posts.count()
+            )
+
+    def test_author_back_to_push_backfilled(self):
+        """
+        Вернувшийся к раскладке автор дозаполняет ленты подписчиков
+        постами, которые читались при запросе, - по частям.
+        """
+        create_missing_stats()
+        readers = [self.user] + [
+            User.objects.create(username=f'Reader{i}') for i in range(2)
+        ]
+        with mock.patch.multiple(
+            'posts.feed', FANOUT_LIMIT=3, PUSH_LIMIT=3, FOLLOWERS_PER_TASK=1
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                for reader in readers:
+                    Follow.objects.create(user=reader, author=self.author)
+                post = Post.objects.create(
+                    author=self.author, text='Пост для подписчиков'
+                )
+            self.assertFalse(FeedEntry.objects.exists())
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.filter(user=readers[-1]).delete()
+            self.assertTrue(is_fanout_author(self.author))
+        # Посты до перехода на чтение уже лежали в лентах - только новый.
+        for reader in readers[:-1]:
+            self.assertQuerysetEqual(
+                get_feed(reader), [post], transform=lambda post: post
+            )
+
+    def test_fanout_limits_hysteresis(self):
+        """Автор между порогами не переключается с каждой подпиской."""
+        create_missing_stats()
+        readers = [
+            User.objects.create(username=f'Reader{i}') for i in range(3)
+        ]
+        with mock.patch.multiple('posts.feed', FANOUT_LIMIT=3, PUSH_LIMIT=2):
+            for reader in readers:
+                Follow.objects.create(user=reader, author=self.author)
+            self.assertFalse(is_fanout_author(self.author))
+            Follow.objects.filter(user=readers[0]).delete()
+            self.assertFalse(is_fanout_author(self.author))
+            Follow.objects.filter(user=readers[1]).delete()
+            self.assertTrue(is_fanout_author(self.author))
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete
+
+from .test import PostsTestCase
+from posts import follows
+from posts.counters import create_missing_stats
+from posts.models import Follow, User, UserStats
+
+
+class PostsFollowsTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        create_missing_stats()
+        User.objects.bulk_create(
+            User(username=f'Writer{i}') for i in range(5)
+        )
+        self.authors = list(
+            User.objects.filter(username__startswith='Writer').order_by('pk')
+        )
+
+    def followers_count(self, author):
+        return UserStats.objects.get(user=author).followers_count
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не создает строку и не меняет счетчики."""
+        self.assertTrue(follows.follow(self.user, self.author))
+        self.assertFalse(follows.follow(self.user, self.author))
+        self.assertFalse(follows.follow(self.author, self.author))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.followers_count(self.author), 1)
+
+    def test_unfollow_is_idempotent(self):
+        """Повторная отписка ничего не удаляет и не меняет счетчики."""
+        follows.follow(self.user, self.author)
+        # Тест идет в транзакции, поэтому atomic - точка сохранения:
+        # SAVEPOINT и RELEASE вокруг запросов.
+        with self.assertNumQueries(7):
+            # SELECT ... FOR UPDATE, DELETE, два обновления счетчиков
+            # и проверка возврата автора к раскладке (PUSH_LIMIT).
+            self.assertTrue(follows.unfollow(self.user, self.author))
+        with self.assertNumQueries(3):
+            self.assertFalse(follows.unfollow(self.user, self.author))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.followers_count(self.author), 0)
+
+    def test_unfollow_signal_instance(self):
+        """Сигнал удаления получает сохраненную подписку с pk."""
+        follows.follow(self.user, self.author)
+        pk = Follow.objects.get().pk
+        received = []
+
+        def receiver(sender, instance, **kwargs):
+            received.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Follow)
+        try:
+            follows.unfollow(self.user, self.author)
+        finally:
+            post_delete.disconnect(receiver, sender=Follow)
+        self.assertEqual(received, [pk])
+
+    def test_unique_following(self):
+        """Ограничение не дает создать повторную подписку."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+
+    def test_followed_authors(self):
+        """Подписки на список авторов - один запрос, затем из кеша."""
+        for author in self.authors[:2]:
+            follows.follow(self.user, author)
+        author_ids = [author.pk for author in self.authors]
+        expected = {author.pk for author in self.authors[:2]}
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                follows.followed_authors(self.user, author_ids), expected
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                follows.followed_authors(self.user, author_ids), expected
+            )
+            self.assertEqual(
+                follows.followed_authors(AnonymousUser(), author_ids),
+                frozenset(),
+            )
+
+        follows.unfollow(self.user, self.authors[0])
+        self.assertFalse(follows.is_following(self.user, self.authors[0]))
+        follows.follow(self.user, self.authors[4])
+        self.assertTrue(follows.is_following(self.user, self.authors[4]))
+
+    def test_followed_authors_without_cache(self):
+        """Подписки сверх FOLLOWING_CACHE_MAX проверяются запросом."""
+        for author in self.authors[:3]:
+            follows.follow(self.user, author)
+        author_ids = [self.authors[0].pk, self.authors[4].pk]
+        with mock.patch.object(follows, 'FOLLOWING_CACHE_MAX', 2):
+            follows.followed_authors(self.user, author_ids)
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    follows.followed_authors(self.user, author_ids),
+                    {self.authors[0].pk},
+                )
@@ -0,0 +1,60 @@
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .test import PostsTestCase
+from posts.feed import backfill_feed
+from posts.models import Follow
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN')
+class PostsIndexesTests(PostsTestCase):
+    def query_plans(self, client, url, data=None):
+        """Планы SQLite для запросов к таблицам posts при открытии url."""
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'posts_' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return response, plans
+
+    def assertIndexed(self, plans):
+        for sql, plan in plans.items():
+            with self.subTest(sql=sql):
+                for step in plan:
+                    self.assertNotIn('TEMP B-TREE', step)
+                    if step.startswith('SCAN'):
+                        self.assertIn('INDEX', step)
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты и страницы постов читаются по индексам без сортировки."""
+        Follow.objects.create(user=self.user, author=self.author)
+        backfill_feed(self.user, self.author)
+        pages = (
+            (self.client, self.INDEX_PAGE),
+            (self.client, self.TRENDING_PAGE),
+            (self.client, self.GROUP_PAGE),
+            (self.client, self.PROFILE_PAGE),
+            (self.client_user, self.PROFILE_PAGE),
+            (self.client_user, self.FOLLOW_PAGE),
+        )
+        for client, url in pages:
+            with self.subTest(address=url, client=client.name):
+                response, plans = self.query_plans(client, url)
+                self.assertTrue(plans)
+                self.assertIndexed(plans)
+
+                next_cursor = response.context['page_obj'].next_cursor
+                _, plans = self.query_plans(
+                    client, url, {'after': next_cursor}
+                )
+                self.assertIndexed(plans)
+
+        _, plans = self.query_plans(self.client, self.POST_DETAIL_PAGE)
+        self.assertIndexed(plans)
@@ -0,0 +1,82 @@
+from django.http import Http404
+from django.test import override_settings
+
+from .test import PostsTestCase
+from posts import objects
+from posts.cache import bump, post_scope
+from posts.counters import create_missing_stats
+from posts.models import Post
+
+
+class PostsObjectCacheTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        objects.posts.clear()
+        objects.groups.clear()
+        create_missing_stats()
+
+    def test_post_from_memory(self):
+        """Повторное чтение поста не обращается к БД."""
+        objects.get_post_or_404(self.post.pk)
+        with self.assertNumQueries(0):
+            post = objects.get_post_or_404(self.post.pk)
+            self.assertEqual(post.author.stats.user_id, self.author.pk)
+            self.assertEqual(post.group.slug, self.post.group.slug)
+        self.assertIsNot(post, objects.get_post_or_404(self.post.pk))
+
+    def test_post_changed(self):
+        """Правка поста сразу видна, в том числе из другого процесса."""
+        objects.get_post_or_404(self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(text='Обновлено')
+        # Другой воркер только сдвигает поколение - сигнала здесь нет.
+        bump(post_scope(self.post.pk))
+        self.assertEqual(
+            objects.get_post_or_404(self.post.pk).text, 'Обновлено'
+        )
+
+        self.post.text = 'Еще раз'
+        self.post.save()
+        invalidations = objects.posts.stats()['invalidations']
+        self.assertEqual(
+            objects.get_post_or_404(self.post.pk).text, 'Еще раз'
+        )
+        self.assertEqual(objects.posts.stats()['invalidations'],
+                         invalidations)
+
+    def test_group_changed(self):
+        """Правка группы сбрасывает ее копию."""
+        objects.get_group_or_404(self.group.slug)
+        with self.assertNumQueries(0):
+            objects.get_group_or_404(self.group.slug)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(
+            objects.get_group_or_404(self.group.slug).title,
+            'Новое название',
+        )
+
+    def test_group_posts_count(self):
+        """Новый пост в группе виден в счетчике на странице группы."""
+        response = self.client.get(self.GROUP_PAGE)
+        count = response.context['group'].posts_count
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        response = self.client.get(self.GROUP_PAGE)
+        self.assertEqual(response.context['group'].posts_count, count + 1)
+        self.assertContains(response, f'Записей: {count + 1}')
+
+    def test_missing_objects(self):
+        """Несуществующие пост и группа - 404, промах не запоминается."""
+        with self.assertRaises(Http404):
+            objects.get_post_or_404(0)
+        with self.assertRaises(Http404):
+            objects.get_group_or_404('missing')
+        self.assertEqual(objects.groups.stats()['entries'], 0)
+
+    @override_settings(OBJECT_CACHE=False)
+    def test_object_cache_switch(self):
+        """Кеш объектов можно отключить."""
+        objects.get_group_or_404(self.group.slug)
+        with self.assertNumQueries(1):
+            objects.get_group_or_404(self.group.slug)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+
+from .test import PostsTestCase
+from posts.counters import create_missing_stats
+from posts.feed import backfill_feed
+from posts.models import Comment, Follow, Post, User
+
+
+class PostsQueriesTests(PostsTestCase):
+    # Сессия и пользователь - два запроса для авторизованного клиента.
+    QUERIES_ANONYMOUS = {
+        'INDEX_PAGE': 1,
+        'TRENDING_PAGE': 2,
+        'GROUP_PAGE': 2,
+        'PROFILE_PAGE': 2,
+        'POST_DETAIL_PAGE': 3,
+    }
+    # Лента подписок еще выводит рекомендации: строка рекомендаций,
+    # популярные авторы для новичка, подписки и авторы со счетчиками.
+    QUERIES_USER = {
+        'INDEX_PAGE': 3,
+        'TRENDING_PAGE': 4,
+        'FOLLOW_PAGE': 8,
+        'GROUP_PAGE': 4,
+        'PROFILE_PAGE': 5,
+        'POST_DETAIL_PAGE': 5,
+    }
+
+    def setUp(self):
+        super().setUp()
+        User.objects.create(username='Recommended')
+        create_missing_stats()
+        Follow.objects.create(user=self.user, author=self.author)
+        backfill_feed(self.user, self.author)
+
+    def assertPagesQueries(self):
+        for client, pages in (
+            (self.client, self.QUERIES_ANONYMOUS),
+            (self.client_user, self.QUERIES_USER),
+        ):
+            for page, count in pages.items():
+                with self.subTest(client=client.name, page=page):
+                    cache.clear()
+                    with self.assertNumQueries(count):
+                        client.get(getattr(self, page))
+
+    def test_queries_do_not_depend_on_data_size(self):
+        """Число запросов страниц не растет вместе с данными."""
+        self.assertPagesQueries()
+
+        commentators = User.objects.bulk_create(
+            User(username=f'Commentator{i}') for i in range(50)
+        )
+        create_missing_stats()
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=author, text='Комментарий')
+            for author in User.objects.filter(username__in=[
+                user.username for user in commentators
+            ])
+        )
+        Post.objects.bulk_create(
+            Post(author=self.author, text='Пост', group=self.group)
+            for _ in range(50)
+        )
+        backfill_feed(self.user, self.author)
+        self.assertPagesQueries()
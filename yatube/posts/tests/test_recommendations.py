@@ -0,0 +1,96 @@
+from .test import PostsTestCase
+from posts.counters import create_missing_stats
+from posts.models import Follow, User, UserRecommendations
+from posts.recommendations import (
+    Recommender, rebuild_recommendations, recommended_authors,
+)
+
+
+class PostsRecommendationsTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.bulk_create(
+            User(username=f'Reader{i}') for i in range(3)
+        )
+        User.objects.bulk_create(
+            User(username=f'Writer{i}') for i in range(3)
+        )
+        create_missing_stats()
+        self.readers = list(
+            User.objects.filter(username__startswith='Reader').order_by('pk')
+        )
+        self.writers = list(
+            User.objects.filter(username__startswith='Writer').order_by('pk')
+        )
+
+    def follow(self, user, *authors):
+        for author in authors:
+            Follow.objects.create(user=user, author=author)
+
+    def test_recommender_co_follows(self):
+        """Автор, которого часто читают вместе с подписками, - первый."""
+        recommender = Recommender([])
+        for user in (1, 2, 3):
+            recommender.add_following(user, [10, 20])
+        recommender.add_following(4, [10, 30])
+        recommender.collect()
+        recommender.build()
+        self.assertEqual(recommender.recommend(5, [10]), [20])
+        self.assertEqual(recommender.recommend(1, [10, 20]), [])
+
+    def test_recommender_partitions(self):
+        """Подсчет пар по частям дает тех же соседей, что и за раз."""
+        following = {
+            user: [10 + user % 3, 11 + user % 4, 12, 13 + user % 2]
+            for user in range(20)
+        }
+        neighbors = []
+        for parts in (1, 3):
+            recommender = Recommender([])
+            for part in range(parts):
+                for user, authors in following.items():
+                    recommender.add_following(user, authors, part, parts)
+                recommender.collect()
+            recommender.build()
+            neighbors.append({
+                author: sorted(candidates)
+                for author, candidates in recommender.neighbors.items()
+            })
+        self.assertEqual(neighbors[0], neighbors[1])
+
+    def test_recommender_groups(self):
+        """Без общих подписок советуются авторы групп читаемых авторов."""
+        recommender = Recommender([(10, 1, 5), (20, 1, 3), (30, 2, 9)])
+        recommender.build()
+        self.assertEqual(recommender.recommend(5, [10]), [20])
+
+    def test_rebuild_recommendations(self):
+        """Рекомендации пересчитываются и не содержат подписок."""
+        first, second, third = self.writers
+        for reader in self.readers:
+            self.follow(reader, first, second)
+        self.follow(self.user, first)
+        self.assertEqual(rebuild_recommendations(), 1)
+        row = UserRecommendations.objects.get(user=self.user)
+        self.assertEqual(row.authors, str(second.pk))
+        self.assertEqual(recommended_authors(self.user), [second])
+
+        Follow.objects.create(user=self.user, author=second)
+        self.assertNotIn(second, recommended_authors(self.user))
+
+    def test_popular_authors_for_newcomer(self):
+        """Пользователю без рекомендаций - самые популярные авторы."""
+        for reader in self.readers:
+            self.follow(reader, self.writers[0])
+        authors = recommended_authors(self.user)
+        self.assertEqual(authors[0], self.writers[0])
+        self.assertNotIn(self.user, authors)
+        self.assertEqual(authors[0].stats.followers_count, 3)
+
+    def test_follow_page_shows_recommendations(self):
+        """Лента подписок выводит блок рекомендаций."""
+        response = self.client_user.get(self.FOLLOW_PAGE)
+        self.assertIn(
+            self.writers[0], response.context['recommended_authors']
+        )
+        self.assertContains(response, 'Возможно, вам понравятся')
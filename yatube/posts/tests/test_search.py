@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from .test import PostsTestCase
+from posts import pages
+from posts.models import Comment, Post, SearchEntry
+from posts.search import search_posts, tokenize
+
+
+class SearchTests(PostsTestCase):
+    def test_tokenize_stems_russian_words(self):
+        """Разные формы слова сводятся к одной основе."""
+        self.assertEqual(tokenize('Котами'), tokenize('коты'))
+        self.assertEqual(tokenize('и в на'), [])
+
+    def test_search_ranks_posts_and_comments(self):
+        """Совпадение в тексте поста весит больше, чем в комментарии."""
+        with self.captureOnCommitCallbacks(execute=True):
+            in_text = Post.objects.create(
+                author=self.author, text='Наши рыжие коты спят'
+            )
+            in_comment = Post.objects.create(author=self.author, text='Пост')
+            Comment.objects.create(
+                post=in_comment, author=self.user, text='Где же котики?'
+            )
+            Comment.objects.create(
+                post=in_comment, author=self.user, text='Рыжего кота не видно'
+            )
+        self.assertEqual(list(search_posts('рыжий кот').order_by(
+            '-rank', '-pk'
+        )), [in_text, in_comment])
+
+        in_text.text = 'Текст без животных'
+        with self.captureOnCommitCallbacks(execute=True):
+            in_text.save()
+        self.assertEqual(list(search_posts('кот')), [in_comment])
+
+    def test_search_page(self):
+        """Страница поиска находит посты и группы."""
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(
+            reverse(pages.SEARCH_PAGE), {'q': 'группы'}
+        )
+        self.assertIn(self.group, response.context['groups'])
+        self.assertEqual(len(response.context['page_obj']), 0)
+        response = self.client.get(
+            reverse(pages.SEARCH_PAGE), {'q': 'тестовый пост'}
+        )
+        self.assertTrue(response.context['page_obj'].has_next())
+        self.assertContains(response, '?q=')
+
+    def test_rebuild_index(self):
+        """Команда индексирует посты, созданные в обход сигналов."""
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            search_posts('тестовый').count(), Post.objects.count()
+        )
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.urls import reverse
+
+from .test import PostsTestCase
+from posts import pages
+from posts.models import Post
+from posts.syndication import CONTENT_TYPE, FEED_LIMIT
+
+
+def read(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class SyndicationTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.INDEX_RSS = reverse(pages.INDEX_RSS)
+        cls.GROUP_RSS = reverse(pages.GROUP_RSS, args=[cls.group.slug])
+        cls.PROFILE_RSS = reverse(
+            pages.PROFILE_RSS, args=[cls.author.username]
+        )
+
+    def items(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        channel = ElementTree.fromstring(read(response)).find('channel')
+        return channel.findall('item')
+
+    def test_feeds_list_latest_posts(self):
+        for url, queryset in (
+            (self.INDEX_RSS, Post.objects.all()),
+            (self.GROUP_RSS, self.group.posts.all()),
+            (self.PROFILE_RSS, self.author.posts.all()),
+        ):
+            with self.subTest(url=url):
+                items = self.items(url)
+                self.assertEqual(len(items), min(FEED_LIMIT, len(queryset)))
+                self.assertTrue(
+                    items[0].find('link').text.endswith(
+                        queryset.first().get_absolute_url()
+                    )
+                )
+
+    def test_unknown_group_and_author(self):
+        for url in (
+            reverse(pages.GROUP_RSS, args=['missing']),
+            reverse(pages.PROFILE_RSS, args=['missing']),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_streamed_then_cached_until_new_post(self):
+        response = self.client.get(self.INDEX_RSS)
+        self.assertTrue(response.streaming)
+        content = read(response)
+
+        response = self.client.get(self.INDEX_RSS)
+        self.assertIn('cache;desc="hit"', response['Server-Timing'])
+        self.assertEqual(read(response), content)
+
+        Post.objects.create(author=self.author, text='Новость для ленты')
+        content = read(self.client.get(self.INDEX_RSS)).decode()
+        self.assertIn('Новость для ленты', content)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.GROUP_RSS)['ETag']
+        response = self.client.get(self.GROUP_RSS, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_pages_link_to_feeds(self):
+        for page, feed in (
+            (self.INDEX_PAGE, self.INDEX_RSS),
+            (self.GROUP_PAGE, self.GROUP_RSS),
+            (self.PROFILE_PAGE, self.PROFILE_RSS),
+        ):
+            with self.subTest(page=page):
+                self.assertContains(self.client.get(page), f'href="{feed}"')
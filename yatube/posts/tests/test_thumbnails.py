@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from .test import PostsTestCase
+from posts.models import Post
+from posts.thumbnails import VARIANTS, generate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+# Превью строит обработчик очереди задач, а не запрос загрузки.
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_EAGER=False)
+class ThumbnailsTests(PostsTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnails_generated_after_upload(self):
+        """После загрузки карточка показывает заглушку, затем превью."""
+        image = SimpleUploadedFile(
+            'small.gif', SMALL_GIF, content_type='image/gif'
+        )
+        self.client_author.post(
+            self.POST_CREATE_PAGE,
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image)
+        self.assertIsNone(post.thumbnails())
+        self.assertContains(
+            self.client.get(self.INDEX_PAGE), 'img/thumbnail.svg'
+        )
+
+        generate_thumbnails(post.pk)
+        post.refresh_from_db()
+        for field in VARIANTS:
+            with self.subTest(field=field):
+                self.assertTrue(default_storage.exists(getattr(post, field)))
+        self.assertContains(
+            self.client.get(self.INDEX_PAGE), post.thumbnails()['thumb']
+        )
@@ -0,0 +1,108 @@
+import json
+import re
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from .test import PostsTestCase
+from posts import trending
+from posts.counters import reconcile
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+from posts.search import search_posts
+from posts.transfer import Importer
+
+
+def export_text():
+    out = StringIO()
+    call_command('export_posts', stdout=out, stderr=StringIO())
+    return out.getvalue()
+
+
+def without_ids(text):
+    """Выгрузка без идентификаторов постов: они меняются при импорте."""
+    return re.sub(r'"(id|post)": \d+, ', '', text)
+
+
+# Маленькие пачки: комментарии ссылаются на посты из разных пачек.
+@mock.patch('posts.transfer.BATCH_SIZE', 5)
+class TransferTests(PostsTestCase):
+    def setUp(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        for post in self.posts[:7]:
+            Comment.objects.create(
+                post=post, author=self.user, text=f'Ответ на {post.pk}'
+            )
+
+    def import_text(self, text):
+        out = StringIO()
+        with mock.patch('sys.stdin', StringIO(text)):
+            call_command('import_posts', '-', stdout=out)
+        return out.getvalue()
+
+    def test_export_streams_records(self):
+        lines = [json.loads(line) for line in export_text().splitlines()]
+        self.assertEqual(lines[0], {'type': 'meta', 'version': 1})
+        types = [line['type'] for line in lines[1:]]
+        self.assertEqual(types.count('post'), self.COUNT_POSTS_TEST)
+        self.assertEqual(types.count('comment'), 7)
+        self.assertEqual(types.count('follow'), 1)
+        comment = next(line for line in lines if line['type'] == 'comment')
+        self.assertEqual(comment['author'], self.user.username)
+
+    def test_round_trip(self):
+        """Импорт в пустую базу восстанавливает те же данные."""
+        text = export_text()
+        for model in (Follow, Post, Group, User):
+            model.objects.all().delete()
+
+        output = self.import_text(text)
+        self.assertIn('post: 32', output)
+        self.assertEqual(without_ids(export_text()), without_ids(text))
+        self.assertFalse(any(reconcile().values()))
+        author = User.objects.get(username=self.author.username)
+        self.assertFalse(author.has_usable_password())
+        self.assertTrue(
+            FeedEntry.objects.filter(user__username=self.user.username)
+        )
+        self.assertTrue(search_posts('ответ').exists())
+
+    def test_existing_users_groups_and_follows_skipped(self):
+        output = self.import_text(export_text())
+        self.assertIn('Пропущено: user: 2, group: 2, follow: 1', output)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 2 * self.COUNT_POSTS_TEST)
+
+    def test_post_ids_per_batch(self):
+        """Соответствие id хранится только для текущей пачки постов."""
+        lines = [json.loads(line) for line in export_text().splitlines()]
+        posts = [line for line in lines if line['type'] == 'post']
+        importer = Importer()
+        for record in posts:
+            importer.add(record)
+            self.assertLessEqual(len(importer.post_ids), 5)
+        comment = next(line for line in lines if line['type'] == 'comment')
+        comment['post'] = posts[-1]['id']
+        importer.add(comment)
+        importer.flush()
+        created = Post.objects.get(pk=importer.post_ids[posts[-1]['id']])
+        self.assertEqual(created.text, posts[-1]['text'])
+        self.assertEqual(created.comments.get().text, comment['text'])
+
+    def test_import_scores_only_imported_posts(self):
+        """Импорт оценивает новые посты и не трогает оценки старых."""
+        text = export_text()
+        Post.objects.filter(pk=self.post.pk).update(trending_score=1e6)
+        scores = dict(Post.objects.values_list('pk', 'trending_score'))
+        self.import_text(text)
+        for pk, score in scores.items():
+            self.assertEqual(Post.objects.get(pk=pk).trending_score, score)
+
+        imported = Post.objects.exclude(pk__in=scores)
+        expected = dict(imported.values_list('pk', 'trending_score'))
+        Post.objects.filter(pk__in=scores).delete()
+        trending.rebuild_trending()
+        for pk, score in imported.values_list('pk', 'trending_score'):
+            with self.subTest(pk=pk):
+                self.assertAlmostEqual(score, expected[pk], places=6)
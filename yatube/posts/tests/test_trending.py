@@ -0,0 +1,94 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .test import PostsTestCase
+from posts import trending
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import decode_cursor, encode_cursor
+
+
+class PostsTrendingTests(PostsTestCase):
+    def setUp(self):
+        super().setUp()
+        # Тестовые посты созданы bulk_create, в обход сигналов.
+        trending.rebuild_trending()
+
+    def scores(self, model=Post):
+        return dict(model.objects.values_list('pk', 'trending_score'))
+
+    def test_event_score_decays(self):
+        """Событие через HALF_LIFE весит как вдвое большее сейчас."""
+        now = timezone.now()
+        later = now + datetime.timedelta(seconds=trending.HALF_LIFE)
+        self.assertAlmostEqual(
+            trending.event_score(later), trending.event_score(now, 2)
+        )
+
+    def test_comments_raise_old_post(self):
+        """Обсуждаемый старый пост поднимается над новыми."""
+        old = Post.objects.order_by('pub_date', 'pk').first()
+        Post.objects.create(author=self.author, text='Новый пост')
+        for _ in range(2):
+            Comment.objects.create(
+                post=old, author=self.user, text='Комментарий'
+            )
+        self.assertEqual(trending.trending_posts().first(), old)
+
+    def test_follower_raises_recent_posts(self):
+        """Новый подписчик поднимает свежие посты автора."""
+        before = self.scores()
+        Follow.objects.create(user=self.user, author=self.author)
+        after = self.scores()
+        for pk, score in before.items():
+            self.assertGreater(after[pk], score)
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчет дает те же оценки, что и события по одному."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        posts, groups = self.scores(), self.scores(Group)
+        trending.rebuild_trending()
+        for expected, model in ((posts, Post), (groups, Group)):
+            for pk, score in self.scores(model).items():
+                with self.subTest(model=model.__name__, pk=pk):
+                    self.assertAlmostEqual(score, expected[pk], places=6)
+
+    def test_trending_groups(self):
+        """Обсуждения поднимают группу в блоке популярных."""
+        other = self.groups[1]
+        post = Post.objects.filter(group=other).first()
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        groups = trending.trending_groups()
+        self.assertEqual(groups[0], other)
+        self.assertEqual(len(groups), 2)
+
+    def test_trending_page(self):
+        """Страница популярного листается курсором по оценке."""
+        cache.clear()
+        expected = list(
+            Post.objects.order_by('-trending_score', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+        response = self.client.get(self.TRENDING_PAGE)
+        self.assertContains(response, 'Популярные группы')
+        received = []
+        while True:
+            page_obj = response.context['page_obj']
+            received.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            response = self.client.get(
+                self.TRENDING_PAGE, {'after': page_obj.next_cursor}
+            )
+        self.assertEqual(received, expected)
+
+    def test_float_cursor(self):
+        """Курсор с дробным ключом восстанавливается без потерь."""
+        score = trending.event_score(timezone.now(), 3)
+        self.assertEqual(decode_cursor(encode_cursor(score, 7)), (score, 7))
+        self.assertIsNone(decode_cursor(encode_cursor(float('nan'), 7)))
@@ -11,6 +11,7 @@ class PostsURLTests(PostsTestCase):
             self.client: {
                 self.INDEX_PAGE: HTTPStatus.OK,
                 self.FOLLOW_PAGE: HTTPStatus.FOUND,
+                self.TRENDING_PAGE: HTTPStatus.OK,
                 self.GROUP_PAGE: HTTPStatus.OK,
                 self.PROFILE_PAGE: HTTPStatus.OK,
                 self.PROFILE_FOLLOW: HTTPStatus.FOUND,
@@ -74,6 +75,7 @@ class PostsURLTests(PostsTestCase):
         urls_templates_dict = {
             self.INDEX_PAGE: 'posts/index.html',
             self.FOLLOW_PAGE: 'posts/index.html',
+            self.TRENDING_PAGE: 'posts/index.html',
             self.GROUP_PAGE: 'posts/group_list.html',
             self.PROFILE_PAGE: 'posts/profile_detail.html',
             self.POST_DETAIL_PAGE: 'posts/post_detail.html',
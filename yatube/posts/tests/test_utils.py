@@ -0,0 +1,115 @@
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .test import PostsTestCase
+from posts.models import Post
+from posts.utils import (
+    PAGINATE_BY, decode_cursor, encode_cursor, get_cursor_page,
+    get_page_obj,
+)
+
+
+class CursorPaginationTests(PostsTestCase):
+    def test_cursor_pages_cover_feed(self):
+        """Курсорные страницы проходят ленту целиком без повторов."""
+        posts = Post.objects.all()
+        expected = list(posts.order_by('-pub_date', '-pk'))
+
+        pages = [get_cursor_page(posts)]
+        while pages[-1].has_next():
+            pages.append(
+                get_cursor_page(posts, after=pages[-1].next_cursor)
+            )
+        received = [post for page in pages for post in page]
+        self.assertEqual(received, expected)
+        self.assertFalse(pages[0].has_previous())
+        for page in pages[:-1]:
+            self.assertEqual(len(page), PAGINATE_BY)
+
+        back = get_cursor_page(posts, before=pages[2].previous_cursor)
+        self.assertEqual(back.object_list, pages[1].object_list)
+
+    def test_cursor_page_in_view(self):
+        """Лента отдает курсорную страницу и ссылку на следующую."""
+        cache.clear()
+        response = self.client.get(self.INDEX_PAGE)
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.is_cursor)
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+
+        response = self.client.get(
+            self.INDEX_PAGE, {'after': page_obj.next_cursor}
+        )
+        next_page = response.context['page_obj']
+        self.assertTrue(next_page.has_previous())
+        self.assertFalse(
+            {post.pk for post in page_obj} & {post.pk for post in next_page}
+        )
+
+    def test_cursor_past_the_end(self):
+        """Курсор за концом ленты дает пустую страницу без ссылок."""
+        posts = Post.objects.all()
+        oldest = posts.order_by('pub_date', 'pk').first()
+        newest = posts.order_by('-pub_date', '-pk').first()
+        pages = (
+            get_cursor_page(
+                posts, after=encode_cursor(oldest.pub_date, oldest.pk)
+            ),
+            get_cursor_page(
+                posts, before=encode_cursor(newest.pub_date, newest.pk)
+            ),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                self.assertEqual(len(page), 0)
+                self.assertFalse(page.has_other_pages())
+                self.assertIsNone(page.next_cursor)
+                self.assertIsNone(page.previous_cursor)
+
+    def test_broken_cursor(self):
+        """Битый токен не ломает страницу, а ведет на первую страницу."""
+        self.assertIsNone(decode_cursor('не-токен'))
+        page = get_cursor_page(Post.objects.all(), after='!!!')
+        self.assertFalse(page.has_previous())
+
+
+class PaginatorTagTests(PostsTestCase):
+    def render(self, page_obj, **params):
+        request = RequestFactory().get(self.INDEX_PAGE, params)
+        return Template(
+            '{% load pagination %}{% paginator page_obj %}'
+        ).render(Context({'request': request, 'page_obj': page_obj}))
+
+    def test_page_window_is_bounded(self):
+        """Пагинатор показывает окно номеров вокруг текущей страницы."""
+        page_obj = Paginator(range(10000), 1).page(5000)
+        html = self.render(page_obj, q='тест', page=5000)
+        query = urlencode({'q': 'тест'})
+        for number in (1, 4998, 4999, 5001, 5002, 10000):
+            self.assertIn(f'{query}&amp;page={number}', html)
+        self.assertNotIn('page=4997', html)
+        self.assertNotIn('page=5003', html)
+        self.assertEqual(html.count('page-item'), 9)
+
+    @override_settings(PAGINATOR_COUNT=False)
+    def test_no_count_pages(self):
+        """Без общего числа записей страница не делает COUNT(*)."""
+        request = RequestFactory().get(self.INDEX_PAGE, {'page': 2})
+        with CaptureQueriesContext(connection) as queries:
+            page_obj = get_page_obj(request, Post.objects.all())
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertEqual(len(page_obj), PAGINATE_BY)
+        self.assertTrue(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
+        html = self.render(page_obj, page=2)
+        self.assertIn('page=1', html)
+        self.assertIn('page=3', html)
+        self.assertEqual(html.count('page-item'), 3)
@@ -76,7 +76,8 @@ class PostsViewsTests(PostsTestCase):
         template = 'posts/index.html'
 
         page = self.PROFILE_FOLLOW
-        client.get(page)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.get(page)
         self.assertTrue(get_object_or_404(Follow, user=user, author=author))
 
         page = self.FOLLOW_PAGE
@@ -0,0 +1,51 @@
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import enqueue, task
+
+from . import cache
+from .models import Post
+
+# Поле модели -> геометрия превью. Основное превью совпадает с карточкой
+# поста, малое и retina-варианты идут в srcset.
+VARIANTS: dict = {
+    'image_thumb': '960x339',
+    'image_small': '480x170',
+    'image_retina': '1920x678',
+}
+
+
+@task
+def generate_thumbnails(post_id):
+    """Строит все варианты превью и сохраняет их пути в пост."""
+    post = Post.objects.select_related(
+        'author', 'group'
+    ).filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    paths = {
+        field: get_thumbnail(
+            post.image, geometry, crop='center', upscale=False
+        ).name
+        for field, geometry in VARIANTS.items()
+    }
+    # Картинку могли заменить, пока строились превью.
+    if Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(updated=timezone.now(), **paths):
+        cache.bump(*cache.post_scopes(post))
+
+
+def schedule_thumbnails(post):
+    """
+    Сбрасывает превью поста и ставит их генерацию в очередь задач.
+    """
+    if post.image_thumb:
+        for field in VARIANTS:
+            setattr(post, field, '')
+        post.updated = timezone.now()
+        Post.objects.filter(pk=post.pk).update(
+            updated=post.updated, **{field: '' for field in VARIANTS}
+        )
+    if post.image:
+        enqueue(generate_thumbnails, post.pk)
@@ -0,0 +1,361 @@
+"""
+Перенос контента между окружениями в формате NDJSON.
+    Каждая строка - объект с полем type: user, group, post, comment,
+    follow. Пользователи и группы задаются естественными ключами
+    (username, slug). Посты - идентификатором исходной базы: комментарии
+    пачки постов идут в файле сразу за ней, поэтому при импорте хватает
+    соответствия идентификаторов одной пачки, и память не растет
+    с размером таблиц. Картинки передаются ссылками - путями в хранилище.
+"""
+import datetime
+import json
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import trending
+from .cache import SITE, bump
+from .counters import create_missing_stats, reconcile
+from .feed import rebuild_feeds
+from .follows import forget
+from .models import Comment, Follow, Group, Post, User
+from .search import rebuild_index
+from .utils import BATCH_SIZE
+
+FORMAT_VERSION: int = 1
+
+USER_FIELDS: tuple = (
+    'username', 'first_name', 'last_name', 'email', 'date_joined',
+)
+GROUP_FIELDS: tuple = ('slug', 'title', 'description')
+# Поле записи -> поле для values().
+POST_FIELDS: dict = {
+    'id': 'pk',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'image': 'image',
+    'image_thumb': 'image_thumb',
+    'image_small': 'image_small',
+    'image_retina': 'image_retina',
+}
+COMMENT_FIELDS: dict = {
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+FOLLOW_FIELDS: dict = {
+    'user': 'user__username',
+    'author': 'author__username',
+}
+
+
+def _line(record_type, row, fields):
+    record = {'type': record_type}
+    for name, lookup in fields.items():
+        value = row[lookup]
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        record[name] = value
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _stream(queryset, fields):
+    return queryset.values(*fields.values()).iterator(chunk_size=BATCH_SIZE)
+
+
+def export(out, progress=None):
+    """
+    Пишет в файл out все данные построчно.
+        progress(type, count) вызывается после каждой пачки.
+    Возвращает {type: число записей}.
+    """
+    report = progress or (lambda record_type, count: None)
+    counts = dict.fromkeys(('user', 'group', 'post', 'comment', 'follow'), 0)
+
+    def write(record_type, rows, fields):
+        for row in rows:
+            out.write(_line(record_type, row, fields))
+            counts[record_type] += 1
+            if counts[record_type] % BATCH_SIZE == 0:
+                report(record_type, counts[record_type])
+
+    out.write(json.dumps({'type': 'meta', 'version': FORMAT_VERSION}) + '\n')
+    user_fields = {name: name for name in USER_FIELDS}
+    write('user', _stream(User.objects.order_by('pk'), user_fields),
+          user_fields)
+    group_fields = {name: name for name in GROUP_FIELDS}
+    write('group', _stream(Group.objects.order_by('pk'), group_fields),
+          group_fields)
+
+    # Посты - пачками по ключу, за каждой пачкой ее комментарии.
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values(
+                *POST_FIELDS.values()
+            )[:BATCH_SIZE]
+        )
+        if not posts:
+            break
+        last_pk = posts[-1]['pk']
+        write('post', posts, POST_FIELDS)
+        write(
+            'comment',
+            _stream(
+                Comment.objects.filter(
+                    post_id__in=[post['pk'] for post in posts]
+                ).order_by('post', 'pk'),
+                COMMENT_FIELDS,
+            ),
+            COMMENT_FIELDS,
+        )
+    write('follow', _stream(Follow.objects.order_by('pk'), FOLLOW_FIELDS),
+          FOLLOW_FIELDS)
+    for record_type, count in counts.items():
+        report(record_type, count)
+    return counts
+
+
+def _pks(model, field, values):
+    return dict(
+        model.objects.filter(**{f'{field}__in': set(values)}).values_list(
+            field, 'pk'
+        )
+    )
+
+
+def _create(model, objects, dates):
+    """
+    Создает объекты и возвращает их с новыми pk в исходном порядке.
+        PostgreSQL возвращает pk из bulk_create. SQLite - нет, и новые
+        строки дочитываются последними по pk: запись в SQLite держит
+        блокировку базы до конца транзакции, а AUTOINCREMENT не выдает
+        меньших pk, так что чужих строк среди них нет.
+        Поля auto_now(_add) затираются при вставке, их значения из
+        dates [{поле: дата}] записываются отдельно.
+    """
+    returns_pks = connection.features.can_return_ids_from_bulk_insert
+    with transaction.atomic():
+        created = model.objects.bulk_create(objects)
+        if created and not returns_pks:
+            pks = list(model.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(created)])
+            for obj, pk in zip(created, reversed(pks)):
+                obj.pk = pk
+        for obj, values in zip(created, dates):
+            for field, value in values.items():
+                setattr(obj, field, value)
+        if created and dates[0]:
+            model.objects.bulk_update(created, list(dates[0]))
+    return created
+
+
+class Importer:
+    """
+    Читает записи по одной и вставляет их пачками.
+        Пачка сбрасывается, когда набрано BATCH_SIZE записей или
+        сменился тип записи: комментариям нужны уже созданные посты.
+    """
+
+    def __init__(self, progress=None):
+        self.report = progress or (lambda record_type, count: None)
+        self.counts = {}
+        self.skipped = {}
+        self.batch_type = None
+        self.batch = []
+        # Исходный id поста -> новый, только для текущей пачки постов.
+        self.post_ids = {}
+        # Новый id поста -> id группы для оценок популярности групп.
+        self.post_groups = {}
+
+    def add(self, record):
+        record_type = record.get('type')
+        if record_type == 'meta':
+            if record.get('version') != FORMAT_VERSION:
+                raise ValueError(
+                    f'Неподдерживаемая версия формата: {record.get("version")}'
+                )
+            return
+        if record_type not in self.HANDLERS:
+            raise ValueError(f'Неизвестный тип записи: {record_type}')
+        if record_type != self.batch_type or len(self.batch) >= BATCH_SIZE:
+            self.flush()
+            if record_type == 'post':
+                # Выгрузка пишет комментарии сразу за пачкой постов не
+                # больше BATCH_SIZE: соответствие прошлой пачки не нужно.
+                self.post_ids, self.post_groups = {}, {}
+            self.batch_type = record_type
+        self.batch.append(record)
+
+    def flush(self):
+        if not self.batch:
+            return
+        created = self.HANDLERS[self.batch_type](self, self.batch)
+        skipped = len(self.batch) - created
+        self.counts[self.batch_type] = (
+            self.counts.get(self.batch_type, 0) + created
+        )
+        if skipped:
+            self.skipped[self.batch_type] = (
+                self.skipped.get(self.batch_type, 0) + skipped
+            )
+        self.report(self.batch_type, self.counts[self.batch_type])
+        self.batch = []
+
+    def users(self, records):
+        existing = _pks(User, 'username', (r['username'] for r in records))
+        users = []
+        for record in records:
+            if record['username'] in existing:
+                continue
+            user = User(**{field: record[field] for field in USER_FIELDS})
+            user.date_joined = parse_datetime(record['date_joined'])
+            # Пароли не переносятся: пользователь восстановит доступ
+            # через сброс пароля.
+            user.set_unusable_password()
+            users.append(user)
+            existing[user.username] = None
+        User.objects.bulk_create(users)
+        return len(users)
+
+    def groups(self, records):
+        existing = _pks(Group, 'slug', (r['slug'] for r in records))
+        groups = []
+        for record in records:
+            if record['slug'] not in existing:
+                groups.append(
+                    Group(**{field: record[field] for field in GROUP_FIELDS})
+                )
+                existing[record['slug']] = None
+        Group.objects.bulk_create(groups)
+        return len(groups)
+
+    def posts(self, records):
+        authors = _pks(User, 'username', (r['author'] for r in records))
+        groups = _pks(Group, 'slug', (r['group'] for r in records))
+        posts, dates, source_ids = [], [], []
+        group_scores = {}
+        for record in records:
+            if record['author'] not in authors:
+                continue
+            pub_date = parse_datetime(record['pub_date'])
+            # Оценка - как у rebuild_trending: только событие публикации.
+            score = trending.event_score(pub_date, trending.PUBLISH_WEIGHT)
+            group_id = groups.get(record['group'])
+            if group_id is not None:
+                trending.merge_score(group_scores, group_id, score)
+            posts.append(Post(
+                author_id=authors[record['author']],
+                group_id=group_id,
+                trending_score=score,
+                text=record['text'],
+                image=record['image'],
+                image_thumb=record['image_thumb'],
+                image_small=record['image_small'],
+                image_retina=record['image_retina'],
+            ))
+            dates.append({
+                'pub_date': pub_date,
+                'updated': parse_datetime(record['updated']),
+            })
+            source_ids.append(record['id'])
+        created = _create(Post, posts, dates)
+        for source_id, post in zip(source_ids, created):
+            self.post_ids[source_id] = post.pk
+            self.post_groups[post.pk] = post.group_id
+        trending.add_scores(Group, group_scores)
+        return len(created)
+
+    def comments(self, records):
+        authors = _pks(User, 'username', (r['author'] for r in records))
+        comments, dates = [], []
+        post_scores, group_scores = {}, {}
+        for record in records:
+            post_id = self.post_ids.get(record['post'])
+            if post_id is None or record['author'] not in authors:
+                continue
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=authors[record['author']],
+                text=record['text'],
+            ))
+            created = parse_datetime(record['created'])
+            dates.append({'created': created})
+            score = trending.event_score(created, trending.COMMENT_WEIGHT)
+            trending.merge_score(post_scores, post_id, score)
+            group_id = self.post_groups[post_id]
+            if group_id is not None:
+                trending.merge_score(group_scores, group_id, score)
+        count = len(_create(Comment, comments, dates))
+        trending.add_scores(Post, post_scores)
+        trending.add_scores(Group, group_scores)
+        return count
+
+    def follows(self, records):
+        users = _pks(
+            User,
+            'username',
+            (name for r in records for name in (r['user'], r['author'])),
+        )
+        # dict сохраняет порядок файла и убирает повторы.
+        pairs = dict.fromkeys(
+            (users[r['user']], users[r['author']]) for r in records
+            if r['user'] in users and r['author'] in users
+            and r['user'] != r['author']
+        )
+        existing = set(
+            Follow.objects.filter(
+                user__in={user for user, _ in pairs}
+            ).values_list('user_id', 'author_id')
+        )
+        follows = [
+            Follow(user_id=user, author_id=author)
+            for user, author in pairs if (user, author) not in existing
+        ]
+        Follow.objects.bulk_create(follows)
+        forget({follow.user_id for follow in follows})
+        return len(follows)
+
+    HANDLERS: dict = {
+        'user': users,
+        'group': groups,
+        'post': posts,
+        'comment': comments,
+        'follow': follows,
+    }
+
+    def finish(self):
+        """
+        Сбрасывает последнюю пачку и обновляет производные данные,
+        которые bulk_create обходит: счетчики, ленты, поисковый индекс
+        и кеш страниц. Оценки популярности добавляются при вставке пачек:
+        полный пересчет стер бы вклад подписок в оценки старых постов.
+        """
+        self.flush()
+        create_missing_stats()
+        reconcile()
+        rebuild_feeds()
+        rebuild_index()
+        bump(SITE)
+        return self.counts
+
+
+def import_lines(lines, progress=None):
+    """
+    Загружает записи из итератора строк NDJSON.
+    Возвращает ({type: создано}, {type: пропущено}).
+    """
+    importer = Importer(progress)
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            importer.add(json.loads(line))
+        except (ValueError, KeyError) as exc:
+            raise ValueError(f'Строка {number}: {exc}') from exc
+    return importer.finish(), importer.skipped
@@ -0,0 +1,178 @@
+"""
+Популярное: посты и группы по оценке, затухающей со временем.
+    Событие с весом w в момент t (публикация, комментарий, новый
+    подписчик автора) добавляет к оценке w * 2 ** ((t - EPOCH) / HALF_LIFE).
+    Хранится логарифм суммы: сама сумма растет экспоненциально,
+    логарифм - линейно. Порядок оценок от текущего момента не зависит,
+    поэтому затухание не требует пересчета: старое событие просто
+    весит меньше нового.
+    Событие добавляется одним UPDATE (log-sum-exp в БД), как счетчики
+    в posts.counters, а лента читается по индексу (оценка, id) курсором:
+    страница стоит один запрос с LIMIT независимо от числа комментариев.
+"""
+import datetime
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .cache import TRENDING, bump
+from .models import Comment, Group, Post
+from .utils import BATCH_SIZE
+
+EPOCH = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+# Через HALF_LIFE секунд событие весит вдвое меньше свежего.
+HALF_LIFE: int = 12 * 60 * 60
+PUBLISH_WEIGHT: float = 1.0
+COMMENT_WEIGHT: float = 2.0
+FOLLOWER_WEIGHT: float = 3.0
+# Новый подписчик поднимает посты автора не старше FOLLOWER_WINDOW.
+FOLLOWER_WINDOW = datetime.timedelta(days=3)
+# Слагаемое меньше в e ** MAX_GAP раз не меняет оценку; ограничение
+# не дает EXP уйти в исчезающе малые числа (PostgreSQL на них падает).
+MAX_GAP: int = 50
+GROUPS_SHOWN: int = 5
+TRENDING_ORDERING: tuple = ('trending_score', 'pk')
+
+
+def event_score(when, weight=1.0):
+    """Логарифм вклада события с весом weight в момент when."""
+    age = (when - EPOCH).total_seconds()
+    return math.log(weight) + age * math.log(2) / HALF_LIFE
+
+
+def _logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(max(low - high, -MAX_GAP)))
+
+
+def _plus(score):
+    """trending_score + событие: log(e ** trending_score + e ** score)."""
+    field = F('trending_score')
+    value = Value(score, output_field=FloatField())
+    return Greatest(field, value) + Ln(
+        1 + Exp(-Least(Abs(field - value), MAX_GAP))
+    )
+
+
+def add_event(queryset, when, weight=1.0):
+    """Атомарно добавляет событие к оценкам строк queryset."""
+    changed = queryset.update(
+        trending_score=_plus(event_score(when, weight))
+    )
+    if changed:
+        bump(TRENDING)
+    return changed
+
+
+def merge_score(scores, pk, score):
+    """Добавляет событие к накопленной в памяти оценке scores[pk]."""
+    scores[pk] = _logaddexp(scores[pk], score) if pk in scores else score
+
+
+def add_scores(model, scores):
+    """
+    Добавляет к оценкам строк model накопленные события {pk: оценка}:
+    по UPDATE на строку, сколько бы событий в ней ни было.
+    """
+    changed = 0
+    for pk, score in scores.items():
+        changed += model.objects.filter(pk=pk).update(
+            trending_score=_plus(score)
+        )
+    if changed:
+        bump(TRENDING)
+    return changed
+
+
+def record_post(post):
+    add_event(
+        Post.objects.filter(pk=post.pk), post.pub_date, PUBLISH_WEIGHT
+    )
+    add_event(
+        Group.objects.filter(pk=post.group_id), post.pub_date, PUBLISH_WEIGHT
+    )
+
+
+def record_comment(comment):
+    add_event(
+        Post.objects.filter(pk=comment.post_id),
+        comment.created,
+        COMMENT_WEIGHT,
+    )
+    add_event(
+        Group.objects.filter(posts=comment.post_id),
+        comment.created,
+        COMMENT_WEIGHT,
+    )
+
+
+def record_follower(author_id, when=None):
+    """Новый подписчик поднимает свежие посты автора."""
+    when = when or timezone.now()
+    add_event(
+        Post.objects.filter(
+            author_id=author_id, pub_date__gte=when - FOLLOWER_WINDOW
+        ),
+        when,
+        FOLLOWER_WEIGHT,
+    )
+
+
+def trending_posts():
+    return Post.objects.select_related('author', 'group').order_by(
+        '-trending_score', '-pk'
+    )
+
+
+def trending_groups(limit=GROUPS_SHOWN):
+    """Группы с наибольшей оценкой, без групп без событий."""
+    return list(
+        Group.objects.filter(trending_score__gt=0).order_by(
+            '-trending_score'
+        )[:limit]
+    )
+
+
+def _save(model, scores):
+    model.objects.bulk_update(
+        [model(pk=pk, trending_score=score) for pk, score in scores.items()],
+        ['trending_score'],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def rebuild_trending():
+    """
+    Пересчитывает оценки по публикациям и комментариям - после
+    импорта и для исправления расхождений. У подписок нет даты, их
+    вклад набирается заново новыми подписками.
+    Возвращает (число постов, число групп).
+    """
+    group_scores = dict.fromkeys(
+        Group.objects.values_list('pk', flat=True).iterator(), 0.0
+    )
+    post_scores, post_groups = {}, {}
+    rows = Post.objects.order_by().values_list(
+        'pk', 'group_id', 'pub_date'
+    ).iterator(chunk_size=BATCH_SIZE)
+    for pk, group_id, pub_date in rows:
+        score = event_score(pub_date, PUBLISH_WEIGHT)
+        post_scores[pk] = score
+        if group_id is not None:
+            post_groups[pk] = group_id
+            group_scores[group_id] = _logaddexp(group_scores[group_id], score)
+    rows = Comment.objects.order_by().values_list(
+        'post_id', 'created'
+    ).iterator(chunk_size=BATCH_SIZE)
+    for post_id, created in rows:
+        score = event_score(created, COMMENT_WEIGHT)
+        post_scores[post_id] = _logaddexp(post_scores[post_id], score)
+        group_id = post_groups.get(post_id)
+        if group_id is not None:
+            group_scores[group_id] = _logaddexp(group_scores[group_id], score)
+    _save(Post, post_scores)
+    _save(Group, group_scores)
+    bump(TRENDING)
+    return len(post_scores), len(group_scores)
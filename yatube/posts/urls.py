@@ -11,6 +11,21 @@ urlpatterns = [
         views.index_view,
         name='index'
     ),
+    path(
+        'trending/',
+        views.trending_view,
+        name='trending'
+    ),
+    path(
+        'rss/',
+        views.index_rss,
+        name='index_rss'
+    ),
+    path(
+        'search/',
+        views.search_view,
+        name='search'
+    ),
     path(
         'follow/',
         views.follow_view,
@@ -21,11 +36,21 @@ urlpatterns = [
         views.group_detail_view,
         name='group_detail'
     ),
+    path(
+        'group/<slug:group_slug>/rss/',
+        views.group_rss,
+        name='group_rss'
+    ),
     path(
         'profile/<str:username>/',
         views.profile_detail_view,
         name='profile_detail'
     ),
+    path(
+        'profile/<str:username>/rss/',
+        views.profile_rss,
+        name='profile_rss'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,10 +1,217 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import datetime
+import math
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 PAGINATE_BY: int = 10
+CURSOR_ORDERING: tuple = ('pub_date', 'pk')
+COMMENTS_PER_PAGE: int = 20
+COMMENTS_ORDERING: tuple = ('created', 'pk')
+# Пачка для iterator(chunk_size=...) и массовых вставок и обновлений:
+# ограничивает память на пачку. Лимит параметров одного запроса
+# bulk_create и bulk_update учитывают сами.
+BATCH_SIZE: int = 500
+
+
+def encode_cursor(key, pk):
+    """Упаковывает ключ (дата или число, pk) в непрозрачный токен для URL."""
+    if isinstance(key, datetime.datetime):
+        raw = f'd{key.isoformat()}|{pk}'
+    elif isinstance(key, float):
+        # repr восстанавливается float() без потери точности.
+        raw = f'f{key!r}|{pk}'
+    else:
+        raw = f'n{key}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора. Для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        key, pk = raw.decode().split('|')
+        kind, key = key[:1], key[1:]
+        key = {'d': parse_datetime, 'f': float}.get(kind, int)(key)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if key is None or isinstance(key, float) and not math.isfinite(key):
+        return None
+    return key, pk
+
+
+class CursorPage:
+    """
+    Страница keyset-пагинации.
+        Повторяет интерфейс django.core.paginator.Page, который нужен
+        шаблонам, но без номера страницы и общего числа записей.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def _cursor(self, obj):
+        date_field, pk_field = self.ordering
+        if isinstance(obj, dict):
+            # Страница из values()
+            return encode_cursor(obj[date_field], obj[pk_field])
+        return encode_cursor(
+            getattr(obj, date_field), getattr(obj, pk_field)
+        )
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self._cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self._cursor(self.object_list[0])
+
+
+class NoCountPage(Page):
+    """Страница без общего числа записей: известно лишь, есть ли следующая."""
+    has_count = False
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class NoCountPaginator(Paginator):
+    """
+    Paginator без COUNT(*) для больших таблиц.
+        Страница читается с одной лишней записью - по ней видно,
+        есть ли следующая. Номер последней страницы неизвестен.
+    """
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return max(number, 1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        return NoCountPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except EmptyPage:
+            return self.page(1)
+
+
+def get_cursor_page(posts_list, after=None, before=None,
+                    ordering=CURSOR_ORDERING, per_page=PAGINATE_BY):
+    """
+    Выбирает страницу по ключу (дата, pk) от новых записей к старым.
+        Вместо даты ключом может быть число, например ранг в поиске.
+        after - токен последней записи предыдущей страницы (листаем дальше).
+        before - токен первой записи следующей страницы (листаем назад).
+    Каждая страница - один запрос с LIMIT без OFFSET и COUNT(*).
+    """
+    date_field, pk_field = ordering
+    after = after and decode_cursor(after)
+    before = before and decode_cursor(before)
+
+    if before:
+        date, pk = before
+        rows = list(
+            posts_list.filter(
+                Q(**{f'{date_field}__gt': date})
+                | Q(**{date_field: date, f'{pk_field}__gt': pk})
+            ).order_by(date_field, pk_field)[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        # Пустая страница (курсор новее всех записей) - без соседних:
+        # ссылаться не на что.
+        return CursorPage(rows, ordering, bool(rows), has_previous)
+
+    if after:
+        date, pk = after
+        posts_list = posts_list.filter(
+            Q(**{f'{date_field}__lt': date})
+            | Q(**{date_field: date, f'{pk_field}__lt': pk})
+        )
+    rows = list(
+        posts_list.order_by(f'-{date_field}', f'-{pk_field}')[:per_page + 1]
+    )
+    has_next = len(rows) > per_page
+    return CursorPage(
+        rows[:per_page], ordering, has_next, bool(after and rows)
+    )
 
 
-def get_page_obj(request, posts_list):
-    paginator = Paginator(posts_list, PAGINATE_BY)
+def get_page_obj(request, posts_list, ordering=CURSOR_ORDERING,
+                 per_page=PAGINATE_BY):
+    """
+    Пагинация ленты.
+        По умолчанию - курсорная (?after=/?before=), стоимость страницы
+        не зависит от её глубины.
+        Старые ссылки вида ?page=N обслуживает обычный Paginator,
+        а при PAGINATOR_COUNT = False - NoCountPaginator без COUNT(*).
+    """
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+    if page_number is not None:
+        date_field, pk_field = ordering
+        paginator_class = (
+            Paginator if settings.PAGINATOR_COUNT else NoCountPaginator
+        )
+        paginator = paginator_class(
+            posts_list.order_by(f'-{date_field}', f'-{pk_field}'),
+            per_page
+        )
+        return paginator.get_page(page_number)
+    return get_cursor_page(
+        posts_list,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        ordering=ordering,
+        per_page=per_page,
+    )
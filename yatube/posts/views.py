@@ -1,13 +1,31 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, render, get_object_or_404
-from django.views.decorators.cache import cache_page
-
+from django.urls import reverse
+
+from core.db import read_replica
+from core.tasks import enqueue
+
+from . import tasks
+from .cache import (
+    INDEX, TRENDING, author_scope, group_scope, post_detail_scopes,
+    versioned_cache_page
+)
+from .counters import get_user_stats
+from .feed import FEED_ORDERING, get_feed
+from .follows import follow, is_following, unfollow
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
-from .utils import get_page_obj
-
-
-@cache_page(20, key_prefix='index_page')
+from .models import Post, User
+from .objects import get_group_or_404, get_post_or_404
+from .recommendations import recommended_authors
+from .search import SEARCH_ORDERING, search_groups, search_posts
+from .syndication import rss_response
+from .thumbnails import schedule_thumbnails
+from .trending import TRENDING_ORDERING, trending_groups, trending_posts
+from .utils import COMMENTS_ORDERING, COMMENTS_PER_PAGE, get_page_obj
+
+
+@versioned_cache_page(lambda request: (INDEX,), conditional=True)
+@read_replica
 def index_view(request):
     posts = Post.objects.select_related('author', 'group')
     page_obj = get_page_obj(request, posts)
@@ -17,20 +35,54 @@ def index_view(request):
     return render(request, 'posts/index.html', context)
 
 
+# Правки постов сдвигают INDEX, новые события - TRENDING.
+@versioned_cache_page(lambda request: (INDEX, TRENDING))
+@read_replica
+def trending_view(request):
+    page_obj = get_page_obj(request, trending_posts(), TRENDING_ORDERING)
+    context = {
+        'page_obj': page_obj,
+        'trending_groups': trending_groups(),
+    }
+    return render(request, 'posts/index.html', context)
+
+
+SEARCH_GROUPS_LIMIT: int = 5
+
+
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = groups = None
+    if query:
+        posts = search_posts(query).select_related('author', 'group')
+        page_obj = get_page_obj(request, posts, SEARCH_ORDERING)
+        groups = search_groups(query)[:SEARCH_GROUPS_LIMIT]
+    context = {
+        'query': query,
+        'groups': groups,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def follow_view(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
-    page_obj = get_page_obj(request, posts)
+    posts = get_feed(request.user).select_related('author', 'group')
+    page_obj = get_page_obj(request, posts, FEED_ORDERING)
     context = {
         'page_obj': page_obj,
+        'recommended_authors': recommended_authors(request.user),
     }
     return render(request, 'posts/index.html', context)
 
 
+@versioned_cache_page(
+    lambda request, group_slug: (group_scope(group_slug),),
+    conditional=True,
+)
+@read_replica
 def group_detail_view(request, group_slug):
-    group = get_object_or_404(Group, slug=group_slug)
+    group = get_group_or_404(group_slug)
     posts = group.posts.select_related('author')
     page_obj = get_page_obj(request, posts)
     context = {
@@ -40,14 +92,19 @@ def group_detail_view(request, group_slug):
     return render(request, 'posts/group_detail.html', context)
 
 
+@versioned_cache_page(
+    lambda request, username: (author_scope(username),),
+    conditional=True,
+)
+@read_replica
 def profile_detail_view(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    get_user_stats(author)
     posts = author.posts.select_related('group')
     page_obj = get_page_obj(request, posts)
-    following = (
-        request.user.is_authenticated
-        and author.following.filter(user=request.user).exists()
-    )
+    following = is_following(request.user, author)
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -59,29 +116,28 @@ def profile_detail_view(request, username):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (
-        request.user != author
-        and not author.following.filter(user=request.user).exists()
-    ):
-        Follow.objects.create(user=request.user, author=author)
+    if follow(request.user, author):
+        enqueue(tasks.backfill_feed, request.user.pk, author.pk)
     return redirect('posts:profile_detail', username=author.username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if author.following.filter(user=request.user).exists():
-        Follow.objects.get(author=author, user=request.user).delete()
+    if unfollow(request.user, author):
+        enqueue(tasks.prune_feed, request.user.pk, author.pk)
     return redirect('posts:profile_detail', username=author.username)
 
 
 @login_required
 def post_create_view(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue(tasks.fan_out_post, post.pk)
+        schedule_thumbnails(post)
         return redirect(
             'posts:profile_detail',
             username=request.user.username
@@ -92,9 +148,16 @@ def post_create_view(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@versioned_cache_page(post_detail_scopes, conditional=True)
 def post_detail_view(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_post_or_404(post_id)
+    get_user_stats(post.author)
+    comments = get_page_obj(
+        request,
+        post.comments.select_related('author'),
+        COMMENTS_ORDERING,
+        COMMENTS_PER_PAGE,
+    )
     form = CommentForm()
     context = {
         'post': post,
@@ -121,9 +184,13 @@ def post_edit_view(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -137,5 +204,50 @@ def post_delete(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
+    # Записи лент удаляются каскадно вместе с постом.
     post.delete()
     return redirect('posts:profile_detail', username=post.author.username)
+
+
+@versioned_cache_page(lambda request: (INDEX,), conditional=True)
+@read_replica
+def index_rss(request):
+    return rss_response(
+        request,
+        'Yatube: последние обновления',
+        reverse('posts:index'),
+        'Новые записи на сайте',
+        Post.objects.all(),
+    )
+
+
+@versioned_cache_page(
+    lambda request, group_slug: (group_scope(group_slug),),
+    conditional=True,
+)
+@read_replica
+def group_rss(request, group_slug):
+    group = get_group_or_404(group_slug)
+    return rss_response(
+        request,
+        f'Yatube: {group.title}',
+        reverse('posts:group_detail', args=[group_slug]),
+        group.description,
+        Post.objects.filter(group=group),
+    )
+
+
+@versioned_cache_page(
+    lambda request, username: (author_scope(username),),
+    conditional=True,
+)
+@read_replica
+def profile_rss(request, username):
+    author = get_object_or_404(User, username=username)
+    return rss_response(
+        request,
+        f'Yatube: {author.get_full_name() or author.username}',
+        reverse('posts:profile_detail', args=[username]),
+        f'Записи пользователя @{author.username}',
+        Post.objects.filter(author=author),
+    )
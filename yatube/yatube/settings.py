@@ -47,11 +47,13 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +67,9 @@ MIDDLEWARE = [
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+# Шаблоны приложений подключает app_directories.Loader из TEMPLATE_LOADERS,
+# APP_DIRS с явным списком загрузчиков не совместим.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
 
 ROOT_URLCONF = 'yatube.urls'
 
@@ -76,12 +81,22 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Кеш скомпилированных шаблонов: файлы читаются и разбираются один раз
+# на процесс, а воркер компилирует все шаблоны при старте (yatube/wsgi.py).
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', default=str(not DEBUG)) == 'True'
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if TEMPLATE_CACHE else TEMPLATE_LOADERS
+            ),
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -99,12 +114,50 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# DB_ENGINE: sqlite3 (по умолчанию) или postgresql.
+DB_ENGINE = os.getenv('DB_ENGINE', default='sqlite3')
+# Сколько секунд держать соединение открытым между запросами.
+CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', default=60))
+# Сколько секунд после изменения ленты ее страницы строятся по основной
+# базе: реплика может еще не получить запись (см. posts.cache).
+REPLICA_LAG = int(os.getenv('DB_REPLICA_LAG', default=5))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', default='yatube'),
+            'USER': os.getenv('DB_USER', default='yatube'),
+            'PASSWORD': os.getenv('DB_PASSWORD', default=''),
+            'HOST': os.getenv('DB_HOST', default='localhost'),
+            'PORT': os.getenv('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
+    }
+    # Реплика только для чтения, см. core.db.read_replica
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.getenv('DB_REPLICA_HOST'),
+            'PORT': os.getenv('DB_REPLICA_PORT', default='5432'),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'DB_NAME', default=os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
     }
-}
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+# Соединения SQLite настраивает core.db.configure_sqlite
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', default=256 * 2 ** 20))
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', default=5000))
 
 
 # Password validation
@@ -149,10 +202,75 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кеш горячих постов и групп в памяти процесса (posts.objects).
+OBJECT_CACHE = os.getenv('OBJECT_CACHE', default='True') == 'True'
+OBJECT_CACHE_POSTS = int(os.getenv('OBJECT_CACHE_POSTS', default=1024))
+OBJECT_CACHE_GROUPS = int(os.getenv('OBJECT_CACHE_GROUPS', default=256))
+OBJECT_CACHE_TIMEOUT = int(os.getenv('OBJECT_CACHE_TIMEOUT', default=300))
+
+# Очередь фоновых задач (core.tasks): ленты подписчиков, превью картинок,
+# поисковый индекс. Задачи выполняет обработчик manage.py run_tasks.
+# TASKS_EAGER=True - задачи выполняются в том же процессе после коммита
+# транзакции, без обработчика; включается для тестов (core.test_runner).
+TASKS_EAGER = os.getenv('TASKS_EAGER', default='False') == 'True'
+TASKS_MAX_ATTEMPTS = int(os.getenv('TASKS_MAX_ATTEMPTS', default=5))
+# Пауза перед повтором, секунды; удваивается с каждой попыткой.
+TASKS_RETRY_DELAY = int(os.getenv('TASKS_RETRY_DELAY', default=10))
+# Задача, выполняемая дольше, считается брошенной упавшим обработчиком.
+TASKS_TIMEOUT = int(os.getenv('TASKS_TIMEOUT', default=10 * 60))
+# Сколько секунд хранятся выполненные задачи для метрик задержки.
+TASKS_RETENTION = int(os.getenv('TASKS_RETENTION', default=24 * 60 * 60))
+TASKS_POLL = float(os.getenv('TASKS_POLL', default=1.0))
+# Тесты выполняют задачи в режиме TASKS_EAGER.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# False - страницы ?page=N без COUNT(*) и номера последней страницы.
+PAGINATOR_COUNT = os.getenv('PAGINATOR_COUNT', default='True') == 'True'
+
+# Кеш отрендеренных карточек постов. False - для замера доли попаданий.
+POST_CARD_CACHE = os.getenv('POST_CARD_CACHE', default='True') == 'True'
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Общий для всех воркеров кеш задается переменными окружения:
+# CACHE_BACKEND=redis|memcached|file и CACHE_LOCATION. Для redis нужен
+# пакет django-redis, для memcached - pylibmc; file годится для
+# нескольких воркеров на одной машине. По умолчанию - кеш в памяти процесса.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyLibMCCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='locmem')
+SHARED_CACHE = {
+    'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+    'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    'KEY_PREFIX': 'yatube',
+}
+# LRU в памяти процесса перед общим кешем: копии страниц и карточек
+# постов отдаются без сетевого запроса. Ключи с этими префиксами
+# содержат версию (поколение ленты, дату изменения), см. posts/cache.py.
+CACHE_LOCAL_TIER = os.getenv('CACHE_LOCAL_TIER', default='False') == 'True'
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': SHARED_CACHE,
 }
+if CACHE_LOCAL_TIER:
+    CACHES = {
+        'shared': SHARED_CACHE,
+        'default': {
+            'BACKEND': 'core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_PREFIXES': [
+                    'posts:page', 'posts:card', 'posts:author_of',
+                ],
+                'LOCAL_MAX_ENTRIES': int(
+                    os.getenv('CACHE_LOCAL_MAX_ENTRIES', default=256)
+                ),
+                'LOCAL_TIMEOUT': int(
+                    os.getenv('CACHE_LOCAL_TIMEOUT', default=60)
+                ),
+            },
+        },
+    }